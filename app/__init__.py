@@ -2,14 +2,15 @@ from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
 import os
-from dotenv import load_dotenv
-
-load_dotenv()
+from config import Config, engine_options, is_sqlite    # config loads .env
+from app.engine import apply_sqlite_pragmas
+from app.json_provider import FastJSONProvider
+from app.templating import init_templates
 
 db = SQLAlchemy()
 login_manager = LoginManager()
 
-def create_app():
+def create_app(create_schema=None):
     # Get the base directory
     basedir = os.path.abspath(os.path.dirname(os.path.dirname(__file__)))
     template_dir = os.path.join(basedir, 'templates')
@@ -20,12 +21,25 @@ def create_app():
     os.makedirs(static_dir, exist_ok=True)
     
     app = Flask(__name__,template_folder=template_dir,static_folder=static_dir)
+    app.json = FastJSONProvider(app)
     
+    app.config.from_object(Config)
+    # read again here so the environment at call time wins over import time
     app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-key-12345')
     app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///orderapp.db')
-    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['SQLALCHEMY_DATABASE_URI'], app.config)
+    app.config['REPLICA_DATABASE_URL'] = os.getenv('REPLICA_DATABASE_URL')
+    init_templates(app)
     
     db.init_app(app)
+    
+    if is_sqlite(app.config['SQLALCHEMY_DATABASE_URI']):
+        with app.app_context():
+            apply_sqlite_pragmas(db.engine, app.config['SQLITE_PRAGMAS'])
+    
+    from app.replica import init_replica
+    init_replica(app)
+    
     login_manager.init_app(app)
     login_manager.login_view = 'main.login'
     
@@ -33,7 +47,33 @@ def create_app():
     app.register_blueprint(main_bp)
     init_oauth(app)
     
+    from app.assets import init_assets
+    init_assets(app)
+    
+    from app.compression import init_compression
+    init_compression(app)
+    
+    from app.cache import init_cache
+    init_cache(app)
+    
+    from app.metrics import init_metrics
+    init_metrics(app)
+    
+    from app.cli import register_commands
+    register_commands(app)
+    
+    # Schema setup reflects the database, so it is opt-in on boot; production
+    # runs `flask init-db` once per deploy instead
+    if create_schema is None:
+        create_schema = app.config['AUTO_CREATE_SCHEMA']
+    if create_schema:
+        init_schema(app)
+    
+    return app
+
+def init_schema(app):
+    """Create missing tables and apply pending migrations"""
     with app.app_context():
+        from app.migrations import upgrade
         db.create_all()
-    
-    return app
\ No newline at end of file
+        return upgrade()
@@ -0,0 +1,99 @@
+"""
+Fingerprinted static assets.
+
+`flask build-assets` copies every file under static/ to static/dist/ with a
+content hash in its name, writes a gzip variant next to the compressible
+ones and records the mapping in static/dist/manifest.json. With a manifest
+present, url_for('static', filename='css/style.css') points at the hashed
+copy, which is served with a one-year immutable Cache-Control and as .gz to
+clients that accept it. Files missing from the manifest are served as before.
+"""
+import gzip
+import hashlib
+import json
+import os
+import shutil
+from flask import send_from_directory
+from app.compression import accepts_gzip
+
+DIST_DIR = 'dist'
+MANIFEST = 'manifest.json'
+IMMUTABLE_MAX_AGE = 31536000    # one year
+COMPRESSIBLE = {'.css', '.js', '.mjs', '.svg', '.json', '.txt', '.html', '.map', '.xml', '.ico'}
+MIN_GZIP_SIZE = 256             # smaller files can grow when gzipped
+
+def fingerprint(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:12]
+
+def hashed_name(filename, digest):
+    root, ext = os.path.splitext(filename)
+    return f'{root}.{digest}{ext}'
+
+def source_files(static_folder):
+    """Paths relative to static_folder, skipping the build output"""
+    for root, dirs, files in os.walk(static_folder):
+        if root == static_folder and DIST_DIR in dirs:
+            dirs.remove(DIST_DIR)
+        dirs.sort()
+        for name in sorted(files):
+            path = os.path.relpath(os.path.join(root, name), static_folder)
+            yield path.replace(os.sep, '/')
+
+def build_assets(static_folder, compress_level=9):
+    """Rebuild static/dist/ and its manifest, returns {filename: hashed filename}"""
+    dist = os.path.join(static_folder, DIST_DIR)
+    shutil.rmtree(dist, ignore_errors=True)
+
+    manifest = {}
+    for filename in source_files(static_folder):
+        source = os.path.join(static_folder, filename)
+        hashed = f'{DIST_DIR}/{hashed_name(filename, fingerprint(source))}'
+        target = os.path.join(static_folder, hashed)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copyfile(source, target)
+
+        if os.path.splitext(filename)[1].lower() in COMPRESSIBLE and os.path.getsize(source) >= MIN_GZIP_SIZE:
+            # mtime=0 keeps the .gz byte-identical between builds
+            with open(source, 'rb') as f, open(target + '.gz', 'wb') as out:
+                out.write(gzip.compress(f.read(), compresslevel=compress_level, mtime=0))
+        manifest[filename] = hashed
+
+    with open(os.path.join(dist, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+def load_manifest(app):
+    path = os.path.join(app.static_folder, DIST_DIR, MANIFEST)
+    try:
+        with open(path) as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        manifest = {}
+    app.extensions['asset_manifest'] = manifest
+    app.extensions['asset_files'] = set(manifest.values())
+    return manifest
+
+def init_assets(app):
+    """Point url_for('static') at hashed files and serve them with far-future caching"""
+    load_manifest(app)
+
+    @app.url_defaults
+    def hashed_static_url(endpoint, values):
+        if endpoint == 'static' and 'filename' in values:
+            values['filename'] = app.extensions['asset_manifest'].get(values['filename'], values['filename'])
+
+    def static(filename):
+        if filename not in app.extensions['asset_files']:
+            return app.send_static_file(filename)
+
+        gzipped = accepts_gzip() and os.path.isfile(os.path.join(app.static_folder, filename + '.gz'))
+        # send_file sets Content-Encoding: gzip from the .gz name
+        response = send_from_directory(app.static_folder, filename + '.gz' if gzipped else filename,
+                                       max_age=IMMUTABLE_MAX_AGE)
+        response.cache_control.immutable = True
+        response.vary.add('Accept-Encoding')
+        return response
+
+    if app.has_static_folder:
+        app.view_functions['static'] = static
@@ -0,0 +1,222 @@
+"""
+Async (ASGI) serving path for the polling endpoints.
+
+/api/health, /api/orders and /api/customers are answered by Starlette
+handlers on an async SQLAlchemy engine, so an idle polling connection costs a
+coroutine instead of a worker thread. Responses, keyset paging, ETags and the
+login check match the Flask views: the Flask session cookie is verified with
+the app's SECRET_KEY and `_user_id` is looked up through the same user cache.
+Every other path is passed to the Flask app unchanged.
+
+    uvicorn asgi:app --host 0.0.0.0 --port 5000 --workers 2
+
+Needs the async extras (starlette, uvicorn, a2wsgi and aiosqlite or asyncpg).
+The per-user list cache and /api/metrics only cover requests served by Flask.
+"""
+import contextlib
+from urllib.parse import quote
+from a2wsgi import WSGIMiddleware
+from itsdangerous import BadSignature
+from sqlalchemy import func, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from starlette.applications import Starlette
+from starlette.datastructures import MutableHeaders
+from starlette.middleware import Middleware
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.responses import RedirectResponse, Response
+from starlette.routing import Mount, Route
+from werkzeug.http import parse_accept_header, parse_etags
+from app import create_app, db
+from app.cache import user_cache
+from app.engine import apply_sqlite_pragmas
+from app.etag import etag_value
+from app.models import User, Customer, Order, UserSnapshot
+from app.pagination import InvalidCursor, MAX_LIMIT, keyset_select, parse_limit, trim_page
+from config import engine_options, is_sqlite
+
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'postgresql': 'postgresql+asyncpg',
+    'mysql': 'mysql+aiomysql',
+}
+
+def async_database_url(url):
+    """The same database behind the async driver for its backend"""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f'No async driver configured for {backend}')
+    return url.set(drivername=ASYNC_DRIVERS[backend])
+
+def create_async_db(flask_app):
+    """Async engine and session factory for the Flask app's database"""
+    with flask_app.app_context():
+        # db.engine.url has the instance-relative SQLite path already resolved
+        url = db.engine.url
+    uri = flask_app.config['SQLALCHEMY_DATABASE_URI']
+    engine = create_async_engine(async_database_url(url), **engine_options(uri, flask_app.config))
+    if is_sqlite(uri):
+        apply_sqlite_pragmas(engine.sync_engine, flask_app.config['SQLITE_PRAGMAS'])
+    return engine, async_sessionmaker(engine, expire_on_commit=False)
+
+class AsyncAPI:
+    """Starlette handlers sharing one Flask app's config, session cookie and models"""
+
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self.engine, self.sessions = create_async_db(flask_app)
+        self.serializer = flask_app.session_interface.get_signing_serializer(flask_app)
+        self.gzip_enabled = flask_app.config['COMPRESS_ENABLED']
+        with flask_app.test_request_context():
+            from flask import url_for
+            self.login_url = url_for(flask_app.login_manager.login_view)
+
+    def json(self, data, status_code=200, headers=None):
+        # Flask's provider so bodies are byte-for-byte the same as jsonify()
+        body = self.flask_app.json.response(data).get_data()
+        return Response(body, status_code, headers, media_type='application/json')
+
+    def session_user_id(self, request):
+        cookie = request.cookies.get(self.flask_app.config['SESSION_COOKIE_NAME'])
+        if not cookie or self.serializer is None:
+            return None
+        max_age = int(self.flask_app.permanent_session_lifetime.total_seconds())
+        try:
+            data = self.serializer.loads(cookie, max_age=max_age)
+        except BadSignature:
+            return None
+        try:
+            return int(data.get('_user_id'))
+        except (TypeError, ValueError):
+            return None
+
+    async def load_user(self, session, request):
+        # same lookup as models.load_user, only the database read is awaited
+        user_id = self.session_user_id(request)
+        if user_id is None:
+            return None
+        snapshot = user_cache.get(user_id)
+        if snapshot is None:
+            user = await session.get(User, user_id)
+            if user is None:
+                return None
+            snapshot = UserSnapshot(user)
+            user_cache.set(user_id, snapshot)
+        return snapshot
+
+    def unauthorized(self, request):
+        # what flask_login does for login_required views
+        target = request.url.path + (f'?{request.url.query}' if request.url.query else '')
+        return RedirectResponse(f'{self.login_url}?next={quote(target, safe="")}', 302)
+
+    async def health(self, request):
+        return self.json({'status': 'healthy', 'message': 'Service is running'})
+
+    async def orders(self, request):
+        return await self.list_endpoint(request, 'orders', Order, Order.row_select(), self.serialize_orders)
+
+    async def customers(self, request):
+        return await self.list_endpoint(request, 'customers', Customer, Customer.row_select(), self.serialize_customers)
+
+    async def list_endpoint(self, request, name, model, stmt, serialize):
+        async with self.sessions() as session:
+            user = await self.load_user(session, request)
+            if user is None:
+                return self.unauthorized(request)
+
+            version = await session.scalar(select(User.data_version).where(User.id == user.id))
+            etag = etag_value(name, user.id, version or 0, request.query_params.multi_items())
+            # weak for gzip clients on the 200 and the 304 alike, as conditional_response does
+            weak = self.gzip_enabled and request.method != 'HEAD' and \
+                parse_accept_header(request.headers.get('accept-encoding'))['gzip'] > 0
+            headers = {'ETag': f'W/"{etag}"' if weak else f'"{etag}"'}
+            if parse_etags(request.headers.get('if-none-match')).contains_weak(etag):
+                return Response(status_code=304, headers=headers)
+
+            stmt = stmt.where(model.created_by == user.id)
+            params = request.query_params
+            # Without paging params keep the original full-list response
+            if 'limit' not in params and 'cursor' not in params:
+                rows = (await session.execute(stmt)).all()
+                return self.json(await serialize(session, user, rows), headers=headers)
+
+            try:
+                limit = parse_limit(params.get('limit'))
+                stmt = keyset_select(stmt, model, limit, params.get('cursor'))
+            except InvalidCursor as e:
+                return self.json({'error': str(e)}, 400)
+
+            rows, next_cursor = trim_page((await session.execute(stmt)).all(), limit)
+            return self.json({'items': await serialize(session, user, rows), 'next_cursor': next_cursor},
+                             headers=headers)
+
+    async def serialize_orders(self, session, user, orders):
+        return [Order.row_dict(row) for row in orders]
+
+    async def serialize_customers(self, session, user, customers):
+        counts = await self.order_counts(session, user.id, [c.id for c in customers])
+        return [{
+            'id': c.id,
+            'name': c.name,
+            'phone': c.phone,
+            'created_at': c.created_at.isoformat(),
+            'order_count': counts.get(c.id, 0)
+        } for c in customers]
+
+    async def order_counts(self, session, user_id, customer_ids):
+        # async twin of routes.order_counts
+        if not customer_ids:
+            return {}
+        stmt = select(Order.customer_id, func.count(Order.id)).where(Order.created_by == user_id)
+        if len(customer_ids) <= MAX_LIMIT:
+            stmt = stmt.where(Order.customer_id.in_(customer_ids))
+        return dict((await session.execute(stmt.group_by(Order.customer_id))).all())
+
+class WeakGzipETagMiddleware:
+    """Mark the ETag of a gzipped response weak, as app/compression.py does"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        async def send_weak(message):
+            if message['type'] == 'http.response.start':
+                headers = MutableHeaders(scope=message)
+                etag = headers.get('etag')
+                if etag and not etag.startswith('W/') and headers.get('content-encoding') == 'gzip':
+                    headers['etag'] = 'W/' + etag
+            await send(message)
+
+        await self.app(scope, receive, send_weak)
+
+def create_asgi_app(flask_app=None):
+    """ASGI app serving the read API natively and everything else through Flask"""
+    flask_app = flask_app or create_app()
+    api = AsyncAPI(flask_app)
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        yield
+        await api.engine.dispose()
+
+    middleware = []
+    if flask_app.config['COMPRESS_ENABLED']:
+        # same thresholds as app/compression.py; responses Flask already gzipped pass through.
+        # Listed first so it sees the headers GZipMiddleware sends
+        middleware.append(Middleware(WeakGzipETagMiddleware))
+        middleware.append(Middleware(GZipMiddleware, minimum_size=flask_app.config['COMPRESS_MIN_SIZE'],
+                                     compresslevel=flask_app.config['COMPRESS_LEVEL']))
+
+    app = Starlette(routes=[
+        Route('/api/health', api.health),
+        Route('/api/orders', api.orders),
+        Route('/api/customers', api.customers),
+        Mount('/', app=WSGIMiddleware(flask_app)),
+    ], middleware=middleware, lifespan=lifespan)
+    app.state.api = api
+    return app
@@ -0,0 +1,211 @@
+"""
+Per-user read-through cache for the list endpoints.
+
+Keys include the user's data version, so an entry stops matching as soon as
+any worker commits a write for that user. Entries are also grouped by user,
+so the write routes can drop the now unreachable ones in one call.
+
+The storage sits behind CacheBackend; LRUBackend keeps it in-process, a
+shared store only needs to implement the same four methods.
+"""
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import current_app, g, request, make_response
+from flask_login import current_user
+from app.compression import gzip_cached
+
+class CacheBackend:
+    """Storage interface used by ListCache"""
+
+    def get(self, namespace, key):
+        raise NotImplementedError
+
+    def set(self, namespace, key, value):
+        raise NotImplementedError
+
+    def delete_namespace(self, namespace):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+class LRUBackend(CacheBackend):
+    """Size-bounded in-process LRU, safe to share between threads"""
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()     # (namespace, key) -> value
+        self._namespaces = {}             # namespace -> set of keys
+        self._lock = threading.Lock()
+
+    def get(self, namespace, key):
+        with self._lock:
+            entry_key = (namespace, key)
+            if entry_key not in self._entries:
+                return None
+            self._entries.move_to_end(entry_key)
+            return self._entries[entry_key]
+
+    def set(self, namespace, key, value):
+        with self._lock:
+            entry_key = (namespace, key)
+            self._entries[entry_key] = value
+            self._entries.move_to_end(entry_key)
+            self._namespaces.setdefault(namespace, set()).add(key)
+            while len(self._entries) > self.maxsize:
+                (old_namespace, old_key), _ = self._entries.popitem(last=False)
+                keys = self._namespaces.get(old_namespace)
+                keys.discard(old_key)
+                if not keys:
+                    del self._namespaces[old_namespace]
+
+    def delete_namespace(self, namespace):
+        with self._lock:
+            for key in self._namespaces.pop(namespace, ()):
+                self._entries.pop((namespace, key), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._namespaces.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+class TTLCache:
+    """Size-bounded LRU whose entries also expire after ttl seconds"""
+
+    def __init__(self, maxsize=10000, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()     # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+class ListCache:
+
+    def __init__(self, backend=None):
+        self.backend = backend or LRUBackend()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_set(self, user_id, key, loader):
+        value = self.backend.get(user_id, key)
+        if value is not None:
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = loader()
+        if value is not None:
+            self.backend.set(user_id, key, value)
+        return value
+
+    def invalidate(self, user_id):
+        self.backend.delete_namespace(user_id)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / total, 4) if total else 0.0,
+            'entries': len(self.backend) if hasattr(self.backend, '__len__') else None
+        }
+
+list_cache = ListCache()
+user_cache = TTLCache()
+
+def init_cache(app, backend=None):
+    """Fresh caches per app, sized from LIST_CACHE_SIZE and USER_CACHE_*"""
+    app.config.setdefault('LIST_CACHE_ENABLED', True)
+    app.config.setdefault('LIST_CACHE_SIZE', 1024)
+    app.config.setdefault('USER_CACHE_SIZE', 10000)
+    app.config.setdefault('USER_CACHE_TTL', 60)
+    list_cache.backend = backend or LRUBackend(app.config['LIST_CACHE_SIZE'])
+    list_cache.hits = list_cache.misses = 0
+    user_cache.maxsize = app.config['USER_CACHE_SIZE']
+    user_cache.ttl = app.config['USER_CACHE_TTL']
+    user_cache.clear()
+
+    app.teardown_request(forget_data_version)
+
+def request_data_version():
+    """The current user's data version, read once per request from the same
+    session as the cached views, so it never runs ahead of a lagging replica"""
+    if 'data_version' not in g:
+        from app import replica
+        from app.models import current_data_version    # app.models imports this module
+        g.data_version = current_data_version(current_user.id, replica.read_session())
+    return g.data_version
+
+def forget_data_version(exc=None):
+    g.pop('data_version', None)
+
+def request_key(name):
+    # read before the loader runs, so a body is never older than its version
+    return (name, request_data_version(), tuple(sorted(request.args.items(multi=True))))
+
+def cached_value(name, loader):
+    """Read-through lookup of loader() for the current user and query string"""
+    if not current_app.config.get('LIST_CACHE_ENABLED', True):
+        return loader()
+    return list_cache.get_or_set(current_user.id, request_key(name), loader)
+
+def cached_response(name):
+    """Cache a view's successful response body per user and query string
+
+    Gzip clients are sent a gzipped copy kept alongside the body, so a hit
+    is not compressed again on every request.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not current_app.config.get('LIST_CACHE_ENABLED', True):
+                return view(*args, **kwargs)
+
+            uncached = []
+            def load():
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    uncached.append(response)
+                    return None
+                return {'body': response.get_data(), 'mimetype': response.mimetype, 'gzip': None}
+
+            entry = list_cache.get_or_set(current_user.id, request_key(name), load)
+            if uncached:
+                return uncached[0]
+
+            response = current_app.response_class(entry['body'], mimetype=entry['mimetype'])
+            return gzip_cached(response, entry, current_app.config)
+        return wrapper
+    return decorator
@@ -0,0 +1,61 @@
+import click
+
+def register_commands(app):
+
+    @app.cli.command('sms-worker')
+    @click.option('--batch-size', default=50, show_default=True, help='Messages sent per batch.')
+    @click.option('--max-attempts', default=5, show_default=True, help='Attempts before a message is marked failed.')
+    @click.option('--interval', default=5.0, show_default=True, help='Seconds to sleep when the outbox is empty.')
+    @click.option('--once', is_flag=True, help='Drain what is due and exit.')
+    def sms_worker(batch_size, max_attempts, interval, once):
+        """Send queued SMS confirmations from the outbox."""
+        from app.worker import run_worker
+        run_worker(batch_size=batch_size, max_attempts=max_attempts, poll_interval=interval, once=once)
+
+    @app.cli.command('init-db')
+    def init_db():
+        """Create missing tables and apply pending migrations."""
+        from app import init_schema
+        applied = init_schema(app)
+        print(f"Database ready, applied migrations: {applied}" if applied else "Database ready")
+
+    @app.cli.command('build-assets')
+    def build_assets():
+        """Write content-hashed and gzipped copies of the static files."""
+        from app.assets import build_assets, load_manifest
+        manifest = build_assets(app.static_folder)
+        load_manifest(app)
+        print(f"Built {len(manifest)} static assets")
+
+    @app.cli.command('warm-templates')
+    def warm_templates():
+        """Compile every template into the bytecode cache."""
+        from app.templating import warm_templates
+        print(f"Compiled {warm_templates(app)} templates")
+
+    @app.cli.command('db-upgrade')
+    def db_upgrade():
+        """Apply pending schema migrations."""
+        from app.migrations import upgrade
+        applied = upgrade()
+        print(f"Applied migrations: {applied}" if applied else "Database is up to date")
+
+    @app.cli.command('rebuild-rollups')
+    @click.option('--user-id', type=int, default=None, help='Only rebuild this user.')
+    def rebuild_rollups(user_id):
+        """Recompute order rollups from the orders table."""
+        from app import db, rollups
+        rollups.rebuild(user_id=user_id)
+        db.session.commit()
+        print("Rollups rebuilt" + (f" for user {user_id}" if user_id else ""))
+
+    @app.cli.command('rebuild-search')
+    def rebuild_search():
+        """Repopulate the SQLite full-text search index."""
+        from app import db, search
+        if not search.use_fts():
+            print("Search uses plain indexes on this database, nothing to rebuild")
+            return
+        search.rebuild()
+        db.session.commit()
+        print("Search index rebuilt")
@@ -0,0 +1,103 @@
+"""
+gzip response compression negotiated from Accept-Encoding.
+
+Buffered responses are compressed when they reach COMPRESS_MIN_SIZE bytes.
+Streamed responses (the order export) are compressed chunk by chunk with a
+sync flush after each one, so every chunk still goes out as soon as it is
+produced. File responses and bodies that already have a Content-Encoding
+(the precompressed static assets) are left alone. A compressed response's
+ETag is marked weak, since the bytes differ from the identity encoding.
+"""
+import gzip
+import zlib
+from flask import request
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json', 'application/x-ndjson', 'text/csv', 'text/html',
+    'text/plain', 'text/css', 'application/javascript', 'image/svg+xml',
+}
+
+def accepts_gzip():
+    # quality, not membership: "gzip;q=0" refuses gzip
+    return request.accept_encodings['gzip'] > 0
+
+def negotiates_gzip(config):
+    """Whether this request's compressible responses go out gzipped, size permitting"""
+    return config['COMPRESS_ENABLED'] and request.method != 'HEAD' and accepts_gzip()
+
+def should_compress(response):
+    if response.status_code < 200 or response.status_code in (204, 206, 304):
+        return False
+    if response.direct_passthrough or 'Content-Encoding' in response.headers:
+        return False
+    if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+        return False
+    return 'no-transform' not in response.headers.get('Cache-Control', '')
+
+def gzip_stream(chunks, level):
+    """Compress an iterable of chunks without holding back any of them"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)   # gzip container
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode()
+            data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            if data:
+                yield data
+        yield compressor.flush()
+    finally:
+        if hasattr(chunks, 'close'):
+            chunks.close()
+
+def gzip_data(data, level):
+    # mtime=0 keeps equal bodies byte-identical, so a cached copy stays valid
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+def gzip_cached(response, entry, config):
+    """Gzip a response built from a cache entry, compressing the body only on first use
+
+    The gzipped bytes are kept in entry['gzip'], so later hits skip compress_response.
+    """
+    if not negotiates_gzip(config) or not should_compress(response):
+        return response
+    if len(entry['body']) < config['COMPRESS_MIN_SIZE']:
+        return response
+    if entry.get('gzip') is None:
+        entry['gzip'] = gzip_data(entry['body'], config['COMPRESS_LEVEL'])
+    response.set_data(entry['gzip'])
+    response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    return response
+
+def compress_response(response, level, min_size):
+    if not should_compress(response):
+        return response
+    response.vary.add('Accept-Encoding')
+    if request.method == 'HEAD' or not accepts_gzip():
+        return response
+
+    if response.is_streamed:
+        if response.content_length is not None and response.content_length < min_size:
+            return response
+        response.response = gzip_stream(response.response, level)
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < min_size:
+            return response
+        response.set_data(gzip_data(data, level))
+
+    response.headers['Content-Encoding'] = 'gzip'
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+def init_compression(app):
+    """Compress every response of the app, tuned by the COMPRESS_* settings"""
+
+    @app.after_request
+    def compress(response):
+        if not app.config['COMPRESS_ENABLED']:
+            return response
+        return compress_response(response, app.config['COMPRESS_LEVEL'], app.config['COMPRESS_MIN_SIZE'])
@@ -0,0 +1,13 @@
+from sqlalchemy import event
+
+def apply_sqlite_pragmas(engine, pragmas):
+    """Run the configured PRAGMAs on every new SQLite connection"""
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
@@ -0,0 +1,38 @@
+import hashlib
+from functools import wraps
+from flask import current_app, request, make_response
+from flask_login import current_user
+from app.cache import request_data_version
+from app.compression import negotiates_gzip
+
+def etag_value(name, user_id, data_version, args):
+    # args: (key, value) pairs from the query string, in any order
+    query = '&'.join(f'{k}={v}' for k, v in sorted(args))
+    raw = f'{name}:{user_id}:{data_version}:{query}'
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+def list_etag(name):
+    """Strong ETag from the user's data version and the request's query string"""
+    # the same per-request version keys the cached body served under this tag
+    return etag_value(name, current_user.id, request_data_version(), request.args.items(multi=True))
+
+def conditional_response(name):
+    """Answer If-None-Match with 304 before the view runs its list query"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            etag = list_etag(name)
+            # a gzip client's 200 carries W/"etag" (app/compression.py), so its 304
+            # has to carry the same validator; comparison is weak either way
+            weak = negotiates_gzip(current_app.config)
+            if request.if_none_match.contains_weak(etag):
+                response = make_response('', 304)
+                response.set_etag(etag, weak=weak)
+                return response
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                response.set_etag(etag, weak=weak)
+            return response
+        return wrapper
+    return decorator
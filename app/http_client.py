@@ -0,0 +1,139 @@
+"""
+Shared outbound HTTP client.
+
+One pooled requests.Session per upstream, with its own connect/read
+timeouts, bounded retries with jittered backoff for idempotent calls, and a
+circuit breaker that fails fast while the upstream keeps failing.
+
+    response = get_client('google').get(url, headers=...)
+"""
+import random
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+
+# Per-upstream settings; anything not listed falls back to DEFAULTS
+DEFAULTS = {
+    'connect_timeout': 3.05,
+    'read_timeout': 10,
+    'retries': 2,              # extra attempts for idempotent methods
+    'backoff': 0.2,            # seconds, doubled per attempt before jitter
+    'max_backoff': 2.0,
+    'failure_threshold': 5,    # consecutive failures that open the circuit
+    'reset_timeout': 30,       # seconds before a trial request is let through
+    'pool_maxsize': 10,
+}
+
+UPSTREAMS = {
+    'google': {'read_timeout': 10},
+    # the bulk endpoint is a POST and must not be repeated, the outbox retries instead
+    'africastalking': {'read_timeout': 10, 'retries': 0},
+}
+
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'}
+RETRY_STATUSES = {502, 503, 504}
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised without touching the network while an upstream's circuit is open"""
+
+class CircuitBreaker:
+
+    def __init__(self, failure_threshold=5, reset_timeout=30, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if self.clock() - self.opened_at >= self.reset_timeout:
+            return 'half-open'
+        return 'open'
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == 'half-open':
+                # let one trial request through, the rest keep failing fast
+                self.opened_at = self.clock()
+                return True
+            return state == 'closed'
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_at = self.clock()
+
+class HttpClient:
+
+    def __init__(self, name, **settings):
+        self.name = name
+        self.settings = dict(DEFAULTS, **settings)
+        self.breaker = CircuitBreaker(self.settings['failure_threshold'], self.settings['reset_timeout'])
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=self.settings['pool_maxsize'])
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def backoff_delay(self, attempt):
+        # full jitter: anywhere between 0 and the capped exponential delay
+        cap = min(self.settings['backoff'] * (2 ** attempt), self.settings['max_backoff'])
+        return random.uniform(0, cap)
+
+    def request(self, method, url, retries=None, **kwargs):
+        method = method.upper()
+        if retries is None:
+            retries = self.settings['retries'] if method in IDEMPOTENT_METHODS else 0
+        kwargs.setdefault('timeout', (self.settings['connect_timeout'], self.settings['read_timeout']))
+
+        if not self.breaker.allow():
+            raise CircuitOpenError(f'{self.name} circuit is open, not calling {url}')
+
+        for attempt in range(retries + 1):
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if attempt == retries:
+                    self.breaker.record_failure()
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    self.breaker.record_success()
+                    return response
+                if attempt == retries:
+                    self.breaker.record_failure()
+                    return response
+            time.sleep(self.backoff_delay(attempt))
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+def get_client(name):
+    """Process-wide client for an upstream, created on first use"""
+    with _clients_lock:
+        if name not in _clients:
+            _clients[name] = HttpClient(name, **UPSTREAMS.get(name, {}))
+        return _clients[name]
+
+def reset_clients():
+    with _clients_lock:
+        for client in _clients.values():
+            client.session.close()
+        _clients.clear()
@@ -0,0 +1,181 @@
+"""
+Bulk import of customers and orders.
+
+JSON:  {"customers": [{"ref": "c1", "name": ..., "phone": ...}],
+        "orders": [{"order_name": ..., "price": ..., "customer_ref": "c1" | "customer_id": 5}]}
+CSV:   header row with a `type` column (customer|order) plus
+       ref, name, phone, order_name, price, customer_ref, customer_id
+
+Every row is validated like the /customer and /order forms. Valid rows are
+inserted with batched executemany statements in one transaction, invalid rows
+are reported back with their row number.
+"""
+import csv
+import io
+import json
+from datetime import datetime
+from sqlalchemy import insert
+from app import db
+from app import rollups, search
+from app.models import Customer, Order, SmsOutbox, bump_data_version
+
+BATCH_SIZE = 500
+
+class ImportFormatError(ValueError):
+    pass
+
+def parse_json(text):
+    try:
+        data = json.loads(text)
+    except ValueError:
+        raise ImportFormatError('File is not valid JSON')
+    if not isinstance(data, dict):
+        raise ImportFormatError('JSON must be an object with "customers" and/or "orders" lists')
+
+    for key in ('customers', 'orders'):
+        if not isinstance(data.get(key) or [], list):
+            raise ImportFormatError(f'"{key}" must be a list')
+
+    customers = [(f'customers[{i}]', row) for i, row in enumerate(data.get('customers') or [])]
+    orders = [(f'orders[{i}]', row) for i, row in enumerate(data.get('orders') or [])]
+    return customers, orders
+
+def parse_csv(text):
+    reader = csv.DictReader(io.StringIO(text))
+    if not reader.fieldnames or 'type' not in reader.fieldnames:
+        raise ImportFormatError('CSV must have a header row with a "type" column')
+
+    customers, orders = [], []
+    for line, row in enumerate(reader, 2):
+        kind = (row.get('type') or '').strip().lower()
+        if kind == 'customer':
+            customers.append((f'line {line}', row))
+        elif kind == 'order':
+            orders.append((f'line {line}', row))
+        else:
+            # keep the row so it shows up in the error report
+            orders.append((f'line {line}', {'_error': 'type must be customer or order'}))
+    return customers, orders
+
+def text_field(row, key):
+    value = row.get(key)
+    return str(value).strip() if value is not None else ''
+
+def validate_customer(row):
+    if not isinstance(row, dict):
+        return None, 'Row must be an object'
+    name, phone = text_field(row, 'name'), text_field(row, 'phone')
+    if not name or not phone:
+        return None, 'Name and phone are required'
+    return {'name': name, 'phone': phone}, None
+
+def validate_order(row):
+    if not isinstance(row, dict):
+        return None, 'Row must be an object'
+    if row.get('_error'):
+        return None, row['_error']
+
+    order_name = text_field(row, 'order_name')
+    customer_ref = text_field(row, 'customer_ref')
+    customer_id = text_field(row, 'customer_id')
+    if not order_name or not (customer_ref or customer_id):
+        return None, 'Order name and customer selection are required'
+
+    try:
+        price = float(row.get('price', 0))
+    except (TypeError, ValueError):
+        return None, 'Please enter a valid price'
+    if price <= 0:
+        return None, 'Price must be greater than 0'
+
+    if customer_id and not customer_ref:
+        try:
+            customer_id = int(customer_id)
+        except ValueError:
+            return None, 'Customer not found'
+
+    return {'order_name': order_name, 'price': price,
+            'customer_ref': customer_ref, 'customer_id': customer_id}, None
+
+def owned_customers(user_id, ids):
+    """Map of id -> phone for the given ids that belong to the user"""
+    found = {}
+    ids = list(ids)
+    for start in range(0, len(ids), BATCH_SIZE):
+        chunk = ids[start:start + BATCH_SIZE]
+        rows = (db.session.query(Customer.id, Customer.phone)
+                .filter(Customer.created_by == user_id, Customer.id.in_(chunk)).all())
+        found.update(dict(rows))
+    return found
+
+def insert_batches(model, rows):
+    """executemany in chunks, returning generated ids in input order"""
+    ids = []
+    for start in range(0, len(rows), BATCH_SIZE):
+        stmt = insert(model).returning(model.id, sort_by_parameter_order=True)
+        ids.extend(db.session.scalars(stmt, rows[start:start + BATCH_SIZE]).all())
+    return ids
+
+def run_import(user_id, customers, orders, queue_sms=False):
+    errors = []
+    now = datetime.utcnow()
+
+    # Customers, remembering refs so orders in the same file can point at them
+    customer_rows, refs = [], []
+    for label, row in customers:
+        values, error = validate_customer(row) if isinstance(row, dict) else (None, 'Row must be an object')
+        if error:
+            errors.append({'row': label, 'error': error})
+            continue
+        customer_rows.append(dict(values, created_by=user_id, created_at=now))
+        refs.append(text_field(row, 'ref'))
+
+    customer_ids = insert_batches(Customer, customer_rows) if customer_rows else []
+    search.index_customers([(cid, user_id, r['name'], r['phone']) for cid, r in zip(customer_ids, customer_rows)])
+    ref_map = {ref: (cid, row['phone']) for ref, cid, row in zip(refs, customer_ids, customer_rows) if ref}
+
+    # Orders
+    validated = []
+    for label, row in orders:
+        values, error = validate_order(row)
+        if error:
+            errors.append({'row': label, 'error': error})
+        else:
+            validated.append((label, values))
+
+    existing = owned_customers(user_id, {v['customer_id'] for _, v in validated if not v['customer_ref']})
+    order_rows, phones = [], []
+    for label, values in validated:
+        if values['customer_ref']:
+            customer_id, phone = ref_map.get(values['customer_ref'], (None, None))
+        else:
+            customer_id, phone = values['customer_id'], existing.get(values['customer_id'])
+        if phone is None:
+            errors.append({'row': label, 'error': 'Customer not found'})
+            continue
+        order_rows.append({'order_name': values['order_name'], 'price': values['price'],
+                           'customer_id': customer_id, 'created_by': user_id, 'created_at': now})
+        phones.append(phone)
+
+    order_ids = insert_batches(Order, order_rows) if order_rows else []
+    search.index_orders([(oid, user_id, r['order_name']) for oid, r in zip(order_ids, order_rows)])
+    rollups.record_orders(user_id, [(r['customer_id'], r['created_at'], r['price']) for r in order_rows])
+
+    # SMS is only queued, the sms-worker sends it later
+    sms_rows = []
+    if queue_sms:
+        sms_rows = [{'order_id': oid, 'phone': phone, 'order_name': row['order_name'], 'price': row['price']}
+                    for oid, phone, row in zip(order_ids, phones, order_rows)]
+        for start in range(0, len(sms_rows), BATCH_SIZE):
+            db.session.execute(insert(SmsOutbox), sms_rows[start:start + BATCH_SIZE])
+
+    if customer_ids or order_ids:
+        bump_data_version(user_id)
+    db.session.commit()
+
+    return {
+        'customers_created': len(customer_ids),
+        'orders_created': len(order_ids),
+        'sms_queued': len(sms_rows),
+        'errors': errors
+    }
@@ -0,0 +1,34 @@
+"""
+JSON provider that encodes responses with orjson when it is installed.
+
+jsonify() output matches Flask's DefaultJSONProvider: compact, sorted keys,
+and dates, decimals and dataclasses still go through Flask's default().
+Anything orjson refuses (ints over 64 bits, non-sortable keys) and the
+pretty-printed debug output fall back to the stdlib encoder. Non-ASCII text
+is written as UTF-8 rather than \\u escapes, which decodes to the same values.
+"""
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:     # optional, the stdlib encoder is used instead
+    orjson = None
+
+class FastJSONProvider(DefaultJSONProvider):
+
+    def use_orjson(self):
+        compact = self.compact if self.compact is not None else not self._app.debug
+        return orjson is not None and compact and self.sort_keys
+
+    def response(self, *args, **kwargs):
+        if not self.use_orjson():
+            return super().response(*args, **kwargs)
+
+        obj = self._prepare_response_obj(args, kwargs)
+        options = (orjson.OPT_SORT_KEYS | orjson.OPT_APPEND_NEWLINE
+                   | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS)
+        try:
+            body = orjson.dumps(obj, default=self.default, option=options)
+        except orjson.JSONEncodeError:
+            return super().response(*args, **kwargs)
+        return self._app.response_class(body, mimetype=self.mimetype)
@@ -0,0 +1,159 @@
+"""
+In-process metrics published in Prometheus text format at /api/metrics.
+
+Request latency and status codes come from hooks on main_bp, query counts
+and time from SQLAlchemy cursor events, SMS latency and results from
+SMSService. Values are per process, so scrape every worker (or run a
+single worker per container).
+"""
+import threading
+import time
+from flask import g, has_request_context, request
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+class Counter:
+
+    def __init__(self, name, help, labelnames=()):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(n, '') for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(tuple(labels.get(n, '') for n in self.labelnames), 0)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{format_labels(self.labelnames, key)} {value}')
+        return lines
+
+class Histogram:
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._values = {}     # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(n, '') for n in self.labelnames)
+        with self._lock:
+            data = self._values.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    data[i] += 1
+            data[-2] += value
+            data[-1] += 1
+
+    def count(self, **labels):
+        data = self._values.get(tuple(labels.get(n, '') for n in self.labelnames))
+        return data[-1] if data else 0
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for key, data in sorted(self._values.items()):
+                for bound, bucket_count in zip(self.buckets, data):
+                    labels = format_labels(self.labelnames, key, [('le', repr(float(bound)))])
+                    lines.append(f'{self.name}_bucket{labels} {bucket_count}')
+                labels = format_labels(self.labelnames, key, [('le', '+Inf')])
+                lines.append(f'{self.name}_bucket{labels} {data[-1]}')
+                labels = format_labels(self.labelnames, key)
+                lines.append(f'{self.name}_sum{labels} {data[-2]}')
+                lines.append(f'{self.name}_count{labels} {data[-1]}')
+        return lines
+
+REQUESTS = Counter('http_requests_total', 'HTTP requests by endpoint, method and status', ['endpoint', 'method', 'status'])
+REQUEST_LATENCY = Histogram('http_request_duration_seconds', 'Request latency by endpoint', ['endpoint'])
+DB_QUERIES = Counter('db_queries_total', 'SQL statements executed, by endpoint', ['endpoint'])
+DB_QUERY_SECONDS = Counter('db_query_seconds_total', 'Time spent in SQL statements, by endpoint', ['endpoint'])
+DB_QUERIES_PER_REQUEST = Histogram('db_queries_per_request', 'SQL statements per request', ['endpoint'],
+                                   buckets=(1, 2, 3, 5, 10, 25, 50, 100))
+SMS_LATENCY = Histogram('sms_send_duration_seconds', 'SMS provider call latency')
+SMS_MESSAGES = Counter('sms_messages_total', 'SMS messages by result', ['result'])
+
+REGISTRY = [REQUESTS, REQUEST_LATENCY, DB_QUERIES, DB_QUERY_SECONDS, DB_QUERIES_PER_REQUEST, SMS_LATENCY, SMS_MESSAGES]
+
+def render():
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+def record_sms(duration, results):
+    SMS_LATENCY.observe(duration)
+    sent = sum(1 for ok in results if ok)
+    SMS_MESSAGES.inc(sent, result='sent')
+    SMS_MESSAGES.inc(len(results) - sent, result='failed')
+
+def endpoint_label():
+    return request.endpoint or 'unmatched'
+
+def start_request():
+    g.metrics_started = time.perf_counter()
+    g.metrics_queries = 0
+    g.metrics_query_seconds = 0.0
+
+def finish_request(response, slow_request_ms=None):
+    started = g.pop('metrics_started', None)
+    if started is None:
+        return response
+    elapsed = time.perf_counter() - started
+    endpoint = endpoint_label()
+    queries = g.pop('metrics_queries', 0)
+
+    REQUESTS.inc(endpoint=endpoint, method=request.method, status=str(response.status_code))
+    REQUEST_LATENCY.observe(elapsed, endpoint=endpoint)
+    DB_QUERIES.inc(queries, endpoint=endpoint)
+    DB_QUERY_SECONDS.inc(g.pop('metrics_query_seconds', 0.0), endpoint=endpoint)
+    DB_QUERIES_PER_REQUEST.observe(queries, endpoint=endpoint)
+
+    if slow_request_ms is not None and elapsed * 1000 >= slow_request_ms:
+        print(f"Slow request: {request.method} {request.full_path.rstrip('?')} "
+              f"{response.status_code} {elapsed * 1000:.1f}ms, {queries} queries")
+    return response
+
+def instrument_engine(engine):
+    from sqlalchemy import event
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('metrics_query_start', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info['metrics_query_start'].pop()
+        if has_request_context() and 'metrics_started' in g:
+            g.metrics_queries += 1
+            g.metrics_query_seconds += time.perf_counter() - started
+
+    @event.listens_for(engine, 'handle_error')
+    def handle_error(context):
+        # failed statements never reach after_cursor_execute
+        if context.connection is not None:
+            starts = context.connection.info.get('metrics_query_start')
+            if starts:
+                starts.pop()
+
+def init_metrics(app):
+    """Time SQL statements on this app's engines; request hooks live on main_bp"""
+    from app import db
+    from app.replica import replica_engine
+    with app.app_context():
+        instrument_engine(db.engine)
+    if replica_engine(app) is not None:
+        instrument_engine(replica_engine(app))
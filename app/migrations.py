@@ -0,0 +1,83 @@
+"""
+Versioned schema migrations.
+
+db.create_all() only creates missing tables, it never alters existing ones.
+Each migration below runs once per database, in order, and the applied
+version is recorded in the schema_version table. New databases get the full
+schema from create_all() and the migrations become no-ops.
+"""
+from datetime import datetime
+from sqlalchemy import Table, Column, Integer, String, DateTime, select, func, inspect, text
+from app import db
+from app.models import User, Customer, Order, SmsOutbox, OrderRollup
+
+schema_version = Table(
+    'schema_version', db.metadata,
+    Column('version', Integer, primary_key=True),
+    Column('description', String(200), nullable=False),
+    Column('applied_at', DateTime, default=datetime.utcnow),
+)
+
+def create_indexes(conn, table, *names):
+    # Reuse the indexes declared on the model so definitions live in one place
+    indexes = {index.name: index for index in table.indexes}
+    for name in names:
+        indexes[name].create(conn, checkfirst=True)
+
+def migration_1(conn):
+    # databases from before the SMS outbox don't have its table yet
+    SmsOutbox.__table__.create(conn, checkfirst=True)
+    create_indexes(conn, Customer.__table__, 'ix_customer_created_by_created_at')
+    create_indexes(conn, Order.__table__, 'ix_order_created_by_created_at', 'ix_order_customer_id')
+    create_indexes(conn, SmsOutbox.__table__, 'ix_sms_outbox_status_next_attempt_at')
+
+def add_column(conn, table, column_name, ddl):
+    if column_name not in {c['name'] for c in inspect(conn).get_columns(table.name)}:
+        conn.execute(text(f'ALTER TABLE "{table.name}" ADD COLUMN {column_name} {ddl}'))
+
+def migration_2(conn):
+    add_column(conn, User.__table__, 'data_version', 'INTEGER NOT NULL DEFAULT 0')
+
+def migration_3(conn):
+    from app import rollups
+    OrderRollup.__table__.create(conn, checkfirst=True)
+    rollups.rebuild(conn)
+
+def migration_4(conn):
+    from app import search
+    create_indexes(conn, Customer.__table__, 'ix_customer_created_by_name', 'ix_customer_created_by_phone')
+    create_indexes(conn, Order.__table__, 'ix_order_created_by_order_name')
+    if conn.dialect.name == 'sqlite':
+        search.rebuild(conn)
+
+def migration_5(conn):
+    # PostgreSQL only (ddl_if on the models), SQLite skips them
+    create_indexes(conn, Customer.__table__, 'ix_customer_created_by_lower_name', 'ix_customer_created_by_phone_pattern')
+    create_indexes(conn, Order.__table__, 'ix_order_created_by_lower_order_name')
+
+# (version, description, function) -- append only, never renumber
+MIGRATIONS = [
+    (1, 'owner/time and customer_id indexes', migration_1),
+    (2, 'user.data_version for ETags', migration_2),
+    (3, 'order rollups backfill', migration_3),
+    (4, 'search indexes and FTS5 backfill', migration_4),
+    (5, 'text_pattern_ops indexes for prefix search', migration_5),
+]
+
+def current_version(conn):
+    schema_version.create(conn, checkfirst=True)
+    return conn.execute(select(func.max(schema_version.c.version))).scalar() or 0
+
+def upgrade(engine=None):
+    """Apply pending migrations, returns the list of versions applied"""
+    engine = engine or db.engine
+    applied = []
+    with engine.begin() as conn:
+        version = current_version(conn)
+        for number, description, migrate in MIGRATIONS:
+            if number <= version:
+                continue
+            migrate(conn)
+            conn.execute(schema_version.insert().values(version=number, description=description))
+            applied.append(number)
+    return applied
@@ -1,5 +1,7 @@
 from app import db, login_manager
+from app.cache import user_cache
 from flask_login import UserMixin
+from sqlalchemy import event
 from datetime import datetime
 
 class User(UserMixin, db.Model):
@@ -8,11 +10,19 @@ class User(UserMixin, db.Model):
     email = db.Column(db.String(100), unique=True, nullable=False)
     name = db.Column(db.String(100), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # bumped by every write to the user's customers/orders, used for ETags
+    data_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     
     customers = db.relationship('Customer', backref='user', lazy=True)
     orders = db.relationship('Order', backref='user', lazy=True)
 
 class Customer(db.Model):
+    __table_args__ = (
+        db.Index('ix_customer_created_by_created_at', 'created_by', 'created_at'),
+        db.Index('ix_customer_created_by_name', 'created_by', 'name'),
+        db.Index('ix_customer_created_by_phone', 'created_by', 'phone'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     phone = db.Column(db.String(20), nullable=False)
@@ -20,25 +30,134 @@ class Customer(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     orders = db.relationship('Order', backref='customer', lazy=True, cascade='all, delete-orphan')
+    
+    @classmethod
+    def row_select(cls):
+        # columns of the customer list, read as plain rows
+        return db.select(cls.id, cls.name, cls.phone, cls.created_at)
 
 class Order(db.Model):
+    __table_args__ = (
+        db.Index('ix_order_created_by_created_at', 'created_by', 'created_at'),
+        db.Index('ix_order_created_by_order_name', 'created_by', 'order_name'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     order_name = db.Column(db.String(100), nullable=False)
     price = db.Column(db.Float, nullable=False)
-    customer_id = db.Column(db.Integer, db.ForeignKey('customer.id'), nullable=False)
+    customer_id = db.Column(db.Integer, db.ForeignKey('customer.id'), nullable=False, index=True)
     created_by = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
-    def to_dict(self):
+    EXPORT_FIELDS = ['id', 'order_name', 'price', 'customer_id', 'customer_name', 'created_at']
+    
+    def to_dict(self, customer_name=None):
+        # customer_name can be passed in when it was already selected alongside the order
         return {
             'id': self.id,
             'order_name': self.order_name,
             'price': self.price,
             'customer_id': self.customer_id,
-            'customer_name': self.customer.name,
+            'customer_name': customer_name if customer_name is not None else self.customer.name,
             'created_at': self.created_at.isoformat()
         }
+    
+    @classmethod
+    def row_select(cls):
+        # just the to_dict() columns, so list reads skip ORM hydration and the identity map
+        return (db.select(cls.id, cls.order_name, cls.price, cls.customer_id,
+                          Customer.name.label('customer_name'), cls.created_at)
+                .join(Customer, Customer.id == cls.customer_id))
+    
+    @staticmethod
+    def row_dict(row):
+        # to_dict() for a row_select() row
+        return {
+            'id': row.id,
+            'order_name': row.order_name,
+            'price': row.price,
+            'customer_id': row.customer_id,
+            'customer_name': row.customer_name,
+            'created_at': row.created_at.isoformat()
+        }
+
+# PostgreSQL only: a default-collation btree can't serve LIKE 'q%', these back
+# the prefix search fallback in app/search.py (SQLite searches through FTS5)
+db.Index('ix_customer_created_by_lower_name', Customer.__table__.c.created_by,
+         db.func.lower(Customer.__table__.c.name).label('lower_name'),
+         postgresql_ops={'lower_name': 'text_pattern_ops'}).ddl_if(dialect='postgresql')
+db.Index('ix_customer_created_by_phone_pattern', Customer.__table__.c.created_by, Customer.__table__.c.phone,
+         postgresql_ops={'phone': 'text_pattern_ops'}).ddl_if(dialect='postgresql')
+db.Index('ix_order_created_by_lower_order_name', Order.__table__.c.created_by,
+         db.func.lower(Order.__table__.c.order_name).label('lower_order_name'),
+         postgresql_ops={'lower_order_name': 'text_pattern_ops'}).ddl_if(dialect='postgresql')
+
+class SmsOutbox(db.Model):
+    # pending SMS, written with the order and drained by `flask sms-worker`
+    __table_args__ = (
+        db.Index('ix_sms_outbox_status_next_attempt_at', 'status', 'next_attempt_at'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    order_id = db.Column(db.Integer, db.ForeignKey('order.id', ondelete='SET NULL'), nullable=True)
+    phone = db.Column(db.String(20), nullable=False)
+    order_name = db.Column(db.String(100), nullable=False)
+    price = db.Column(db.Float, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='pending')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.String(255))
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime)
+
+class OrderRollup(db.Model):
+    # per (user, customer, day) order totals, kept in step by app.rollups
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'customer_id', 'day', name='uq_order_rollup_key'),
+        db.Index('ix_order_rollup_user_id_day', 'user_id', 'day'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    customer_id = db.Column(db.Integer, db.ForeignKey('customer.id', ondelete='CASCADE'), nullable=False)
+    day = db.Column(db.Date, nullable=False)
+    order_count = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0)
+
+def bump_data_version(user_id):
+    # Runs as part of the caller's transaction, committed together with the write
+    User.query.filter_by(id=user_id).update(
+        {User.data_version: User.data_version + 1}, synchronize_session=False)
+
+def current_data_version(user_id, session=None):
+    # Read fresh rather than from the cached user so ETags never go stale.
+    # Pass the session the body is read from, a replica may lag the primary
+    return (session or db.session).query(User.data_version).filter_by(id=user_id).scalar() or 0
+
+class UserSnapshot(UserMixin):
+    # Detached copy of the immutable User fields kept in the identity cache
+    __slots__ = ('id', 'google_id', 'email', 'name', 'created_at')
+    
+    def __init__(self, user):
+        self.id = user.id
+        self.google_id = user.google_id
+        self.email = user.email
+        self.name = user.name
+        self.created_at = user.created_at
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def forget_cached_user(mapper, connection, user):
+    user_cache.delete(user.id)
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
\ No newline at end of file
+    user_id = int(user_id)
+    snapshot = user_cache.get(user_id)
+    if snapshot is None:
+        user = db.session.get(User, user_id)
+        if user is None:
+            return None
+        snapshot = UserSnapshot(user)
+        user_cache.set(user_id, snapshot)
+    return snapshot
@@ -0,0 +1,68 @@
+import base64
+import json
+from datetime import datetime
+from sqlalchemy import and_, or_
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 500
+
+class InvalidCursor(ValueError):
+    pass
+
+def encode_cursor(created_at, row_id):
+    """Opaque cursor for the position just after (created_at, id)"""
+    raw = json.dumps([created_at.isoformat(), row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        created_at, row_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except Exception:
+        raise InvalidCursor('Invalid cursor')
+
+def parse_limit(value):
+    if value is None or value == '':
+        return DEFAULT_LIMIT
+    try:
+        limit = int(value)
+    except ValueError:
+        raise InvalidCursor('Invalid limit')
+    return max(1, min(limit, MAX_LIMIT))
+
+def seek_filter(model, cursor):
+    """WHERE clause for the rows after the cursor position, newest first"""
+    created_at, row_id = decode_cursor(cursor)
+    return or_(
+        model.created_at < created_at,
+        and_(model.created_at == created_at, model.id < row_id)
+    )
+
+def newest_first(model):
+    return (model.created_at.desc(), model.id.desc())
+
+def trim_page(rows, limit):
+    # rows were fetched with limit + 1, the extra one only says another page exists
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].created_at, rows[-1].id)
+
+def keyset_page(query, model, limit, cursor=None):
+    """
+    Newest-first page of `query` seeking on (created_at, id).
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    if cursor:
+        query = query.filter(seek_filter(model, cursor))
+
+    rows = query.order_by(*newest_first(model)).limit(limit + 1).all()
+    return trim_page(rows, limit)
+
+def keyset_select(stmt, model, limit, cursor=None):
+    """keyset_page() for a Core select of columns, returns the statement for limit + 1 rows"""
+    if cursor:
+        stmt = stmt.where(seek_filter(model, cursor))
+    return stmt.order_by(*newest_first(model)).limit(limit + 1)
@@ -0,0 +1,96 @@
+"""
+Read/write splitting for the heavy GET views.
+
+With REPLICA_DATABASE_URL set, the app gets a second engine for the replica
+and the dashboard, /api/customers, /api/orders and
+the export read through read_session(); everything else, and every write,
+stays on db.session. After a user writes, their session cookie pins their
+reads to the primary for REPLICA_STICKY_SECONDS so they see their own
+changes through replication lag. If the replica can't be reached, reads go
+to the primary and the replica is tried again after REPLICA_RETRY_SECONDS.
+
+A read-only copy of the SQLite file works as a local replica:
+
+    REPLICA_DATABASE_URL=sqlite:///file:replica.db?mode=ro&uri=true
+"""
+import time
+from flask import current_app, g, session
+from sqlalchemy import create_engine
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+from app import db
+from app.engine import apply_sqlite_pragmas
+from config import engine_options, is_sqlite
+
+REPLICA_ENGINE = 'replica_engine'
+STICKY_KEY = '_read_primary_until'
+
+# monotonic time until which the replica is skipped after a failed connect, per process
+_replica_down_until = 0.0
+
+def init_replica(app):
+    """Create the replica engine, if one is configured"""
+    uri = app.config.get('REPLICA_DATABASE_URL')
+    if not uri:
+        return
+    # kept out of SQLALCHEMY_BINDS, no model lives on the replica
+    engine = create_engine(uri, **engine_options(uri, app.config))
+    if is_sqlite(uri):
+        # a read-only database can't switch journal mode, the primary sets it
+        pragmas = {k: v for k, v in app.config['SQLITE_PRAGMAS'].items() if k != 'journal_mode'}
+        apply_sqlite_pragmas(engine, pragmas)
+    app.extensions[REPLICA_ENGINE] = engine
+
+    app.teardown_request(close_read_session)
+
+def replica_engine(app=None):
+    """The replica engine, or None without a replica"""
+    return (app or current_app).extensions.get(REPLICA_ENGINE)
+
+def has_replica(app=None):
+    return replica_engine(app) is not None
+
+def mark_write():
+    """Pin the current user's reads to the primary for the sticky window"""
+    if has_replica():
+        session[STICKY_KEY] = time.time() + current_app.config['REPLICA_STICKY_SECONDS']
+
+def reads_pinned_to_primary():
+    until = session.get(STICKY_KEY)
+    if until is None:
+        return False
+    if until > time.time():
+        return True
+    session.pop(STICKY_KEY)
+    return False
+
+def read_session():
+    """Session for read-only queries in this request, the replica when it can be used"""
+    if 'read_session' not in g:
+        g.read_session = open_read_session()
+    return g.read_session
+
+def open_read_session():
+    global _replica_down_until
+    if not has_replica() or reads_pinned_to_primary() or _replica_down_until > time.monotonic():
+        return db.session
+
+    try:
+        connection = replica_engine().connect()
+    except DBAPIError as e:
+        _replica_down_until = time.monotonic() + current_app.config['REPLICA_RETRY_SECONDS']
+        print(f"Replica unavailable, reading from the primary: {e.orig}")
+        return db.session
+    g.replica_connection = connection
+    return Session(bind=connection)
+
+def close_read_session(exc=None):
+    reads = g.pop('read_session', None)
+    connection = g.pop('replica_connection', None)
+    if connection is not None:
+        reads.close()
+        connection.close()
+
+def reset_replica_state():
+    global _replica_down_until
+    _replica_down_until = 0.0
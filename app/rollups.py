@@ -0,0 +1,105 @@
+"""
+Order rollups: counts and revenue per (user, customer, day).
+
+The write routes call record_orders() inside their own transaction so the
+rollup table always matches the orders table; rebuild() recomputes it from
+scratch for backfills or repairs.
+"""
+from collections import defaultdict
+from sqlalchemy import func, select, insert, delete, update, and_
+from app import db
+from app.models import Order, OrderRollup, Customer
+
+def record_orders(user_id, orders, sign=1):
+    """
+    Add (sign=1) or remove (sign=-1) orders from the rollups.
+    orders: iterable of (customer_id, created_at, price)
+    """
+    deltas = defaultdict(lambda: [0, 0.0])
+    for customer_id, created_at, price in orders:
+        delta = deltas[(customer_id, created_at.date())]
+        delta[0] += sign
+        delta[1] += sign * price
+
+    for (customer_id, day), (count, revenue) in deltas.items():
+        apply_delta(user_id, customer_id, day, count, revenue)
+
+def apply_delta(user_id, customer_id, day, count, revenue):
+    table = OrderRollup.__table__
+    dialect = db.session.get_bind().dialect.name
+
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert as upsert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as upsert
+        stmt = upsert(table).values(user_id=user_id, customer_id=customer_id, day=day,
+                                    order_count=count, revenue=revenue)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['user_id', 'customer_id', 'day'],
+            set_={'order_count': table.c.order_count + count, 'revenue': table.c.revenue + revenue}
+        )
+        db.session.execute(stmt)
+        return
+
+    # Other databases: update in place, insert when the bucket is new
+    result = db.session.execute(
+        update(table)
+        .where(and_(table.c.user_id == user_id, table.c.customer_id == customer_id, table.c.day == day))
+        .values(order_count=table.c.order_count + count, revenue=table.c.revenue + revenue)
+    )
+    if result.rowcount == 0:
+        db.session.execute(insert(table).values(
+            user_id=user_id, customer_id=customer_id, day=day, order_count=count, revenue=revenue))
+
+def rebuild(conn=None, user_id=None):
+    """Recompute rollups from the orders table, for one user or everyone"""
+    execute = conn.execute if conn is not None else db.session.execute
+    table = OrderRollup.__table__
+    day = func.date(Order.created_at)
+
+    source = (select(Order.created_by, Order.customer_id, day,
+                     func.count(Order.id), func.sum(Order.price))
+              .group_by(Order.created_by, Order.customer_id, day))
+    clear = delete(table)
+    if user_id is not None:
+        source = source.where(Order.created_by == user_id)
+        clear = clear.where(table.c.user_id == user_id)
+
+    execute(clear)
+    execute(insert(table).from_select(
+        ['user_id', 'customer_id', 'day', 'order_count', 'revenue'], source))
+
+def stats(user_id, start=None, end=None, group_by='day'):
+    """Aggregate the rollups between two dates (inclusive) by day, customer or in total"""
+    count = func.sum(OrderRollup.order_count)
+    revenue = func.sum(OrderRollup.revenue)
+
+    if group_by == 'day':
+        query = db.session.query(OrderRollup.day, count, revenue).group_by(OrderRollup.day).order_by(OrderRollup.day)
+    elif group_by == 'customer':
+        query = (db.session.query(OrderRollup.customer_id, Customer.name, count, revenue)
+                 .join(Customer, Customer.id == OrderRollup.customer_id)
+                 .group_by(OrderRollup.customer_id, Customer.name)
+                 .order_by(revenue.desc()))
+    else:
+        query = db.session.query(count, revenue)
+
+    query = query.filter(OrderRollup.user_id == user_id)
+    if start:
+        query = query.filter(OrderRollup.day >= start)
+    if end:
+        query = query.filter(OrderRollup.day <= end)
+
+    rows = []
+    for row in query.all():
+        *key, order_count, total = row
+        if not order_count:
+            continue
+        entry = {'order_count': int(order_count), 'revenue': round(total or 0, 2)}
+        if group_by == 'day':
+            entry['day'] = key[0].isoformat()
+        elif group_by == 'customer':
+            entry['customer_id'], entry['customer_name'] = key
+        rows.append(entry)
+    return rows
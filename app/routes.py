@@ -1,33 +1,51 @@
-from flask import Blueprint, render_template, request, flash, redirect, url_for, jsonify
+from flask import Blueprint, render_template, request, flash, redirect, url_for, jsonify, Response, stream_with_context, current_app
 from flask_login import login_required, current_user, login_user, logout_user
-from authlib.integrations.flask_client import OAuth
-from app.models import User, Customer, Order, db
-from app.services import sms_service
+from app.models import User, Customer, Order, SmsOutbox, bump_data_version, db
+from app.cache import list_cache, user_cache, cached_value, cached_response, request_data_version
+from app.etag import conditional_response
+from app.importer import parse_csv, parse_json, run_import, ImportFormatError
+from app import metrics, replica, rollups, search
+from app.pagination import keyset_page, keyset_select, trim_page, parse_limit, InvalidCursor, MAX_LIMIT
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload
 import os
-
-# Initialize OAuth
-oauth = OAuth()
+import csv
+from datetime import date
+import io
+import json
 
 # Create main blueprint
 main_bp = Blueprint('main', __name__)
 
-def init_oauth(app):
+DASHBOARD_PAGE_SIZE = 25
+EXPORT_CHUNK_SIZE = 1000
+CUSTOMER_SEARCH_LIMIT = 20
 
-    oauth.init_app(app)    # Initialize OAuth with Flask
+def init_oauth(app):
     
     # are Google OAuth credentials are configured
+    # authlib itself is only imported on the first login, see get_oauth()
     client_id = os.getenv('GOOGLE_CLIENT_ID')
     client_secret = os.getenv('GOOGLE_CLIENT_SECRET')
+    app.config['GOOGLE_OAUTH_ENABLED'] = bool(client_id and client_secret)
     
-    if not client_id or not client_secret:
+    if not app.config['GOOGLE_OAUTH_ENABLED']:
         print('Warning: Google OAuth credentials not configured')
-        return
+
+def get_oauth(): # pragma: no cover
+    """authlib OAuth registry for the current app, created on first use"""
+    app = current_app._get_current_object()
+    oauth = app.extensions.get('authlib.integrations.flask_client')
+    if oauth is not None:
+        return oauth
     
-    try: # pragma: no cover
+    from authlib.integrations.flask_client import OAuth
+    oauth = OAuth(app)    # Initialize OAuth with Flask
+    try:
         oauth.register(
             name='google',
-            client_id=client_id,
-            client_secret=client_secret,
+            client_id=os.getenv('GOOGLE_CLIENT_ID'),
+            client_secret=os.getenv('GOOGLE_CLIENT_SECRET'),
             authorize_url='https://accounts.google.com/o/oauth2/auth',
             access_token_url='https://oauth2.googleapis.com/token', 
             userinfo_endpoint='https://www.googleapis.com/oauth2/v1/userinfo',
@@ -38,6 +56,15 @@ def init_oauth(app):
         print('Google OAuth configured successfully')
     except Exception as e:
         print(f'Google OAuth configuration failed: {e}')
+    return oauth
+
+@main_bp.before_request
+def start_request_metrics():
+    metrics.start_request()
+
+@main_bp.after_request
+def finish_request_metrics(response):
+    return metrics.finish_request(response, current_app.config.get('SLOW_REQUEST_MS'))
 
 @main_bp.route('/')
 
@@ -46,13 +73,14 @@ def index():
 
 @main_bp.route('/login')
 def login():
-    if 'google' not in oauth._clients:    # Check if OAuth is configured
+    # Check if OAuth is configured
+    if not current_app.config.get('GOOGLE_OAUTH_ENABLED') or 'google' not in get_oauth()._clients:
         flash('Google OAuth is not configured. Please contact administrator.', 'error')
         return redirect(url_for('main.index'))
     
     try:
         redirect_uri = url_for('main.auth_callback', _external=True)
-        return oauth.google.authorize_redirect(redirect_uri)
+        return get_oauth().google.authorize_redirect(redirect_uri)
     except Exception as e:
         flash('Login service is currently unavailable.', 'error')
         return redirect(url_for('main.index'))
@@ -86,8 +114,9 @@ def auth_callback(): # pragma: no cover
             'redirect_uri': redirect_uri
         }
         
-        import requests
-        token_response = requests.post(token_url, data=token_data)
+        from app.http_client import get_client
+        google = get_client('google')
+        token_response = google.post(token_url, data=token_data)
         print(f"Token response status: {token_response.status_code}")
         
         if token_response.status_code != 200:
@@ -106,7 +135,7 @@ def auth_callback(): # pragma: no cover
         # Get user info using access token
         userinfo_url = 'https://www.googleapis.com/oauth2/v1/userinfo'
         headers = {'Authorization': f'Bearer {access_token}'}
-        userinfo_response = requests.get(userinfo_url, headers=headers)
+        userinfo_response = google.get(userinfo_url, headers=headers)
         
         print(f"Userinfo response status: {userinfo_response.status_code}")
         
@@ -158,6 +187,7 @@ def auth_callback(): # pragma: no cover
 @login_required
 def logout():
     """Logout user"""
+    user_cache.delete(current_user.id)
     logout_user()
     flash('You have been logged out successfully.', 'success')
     return redirect(url_for('main.index'))
@@ -165,10 +195,54 @@ def logout():
 @main_bp.route('/dashboard')
 @login_required
 def dashboard(): 
-    """Main dashboard"""
-    customers = Customer.query.filter_by(created_by=current_user.id).order_by(Customer.created_at.desc()).all()
-    orders = Order.query.filter_by(created_by=current_user.id).order_by(Order.created_at.desc()).all()
-    return render_template('dashboard.html', customers=customers, orders=orders)
+    """Main dashboard, one page of each table plus SQL-side totals"""
+    context = cached_value('dashboard', load_dashboard)
+    return render_template(
+        'dashboard.html',
+        customers_cursor=request.args.get('customers_cursor'),
+        orders_cursor=request.args.get('orders_cursor'),
+        data_version=request_data_version(),   # key for the cached table fragments
+        **context
+    )
+
+def load_dashboard():
+    # Plain values only, so the result can be cached outside the session
+    reads = replica.read_session()
+    customers, customers_next = dashboard_page(
+        reads.query(Customer).filter_by(created_by=current_user.id), Customer, 'customers_cursor')
+    orders, orders_next = dashboard_page(
+        reads.query(Order).filter_by(created_by=current_user.id).options(joinedload(Order.customer)),
+        Order, 'orders_cursor')
+    
+    return {
+        'customers': [{'id': c.id, 'name': c.name, 'phone': c.phone} for c in customers],
+        'orders': [{
+            'id': o.id,
+            'order_name': o.order_name,
+            'price': o.price,
+            'created_at': o.created_at,
+            'customer': {'name': o.customer.name}
+        } for o in orders],
+        'order_counts': order_counts(current_user.id, [c.id for c in customers], reads),
+        'totals': dashboard_totals(current_user.id, reads),
+        'customers_next': customers_next,
+        'orders_next': orders_next
+    }
+
+def dashboard_page(query, model, cursor_arg):
+    try:
+        return keyset_page(query, model, DASHBOARD_PAGE_SIZE, request.args.get(cursor_arg))
+    except InvalidCursor:
+        # Stale or hand-edited link, start from the newest rows
+        return keyset_page(query, model, DASHBOARD_PAGE_SIZE)
+
+def dashboard_totals(user_id, session=None):
+    session = session or db.session
+    customer_count = session.query(func.count(Customer.id)).filter(Customer.created_by == user_id).scalar()
+    order_count, revenue = session.query(
+        func.count(Order.id), func.coalesce(func.sum(Order.price), 0)
+    ).filter(Order.created_by == user_id).one()
+    return {'customers': customer_count, 'orders': order_count, 'revenue': revenue}
 
 @main_bp.route('/customer', methods=['POST'])
 @login_required
@@ -184,7 +258,12 @@ def create_customer():
         
         customer = Customer(name=name, phone=phone, created_by=current_user.id)
         db.session.add(customer)
+        db.session.flush()
+        search.index_customers([(customer.id, current_user.id, name, phone)])
+        bump_data_version(current_user.id)
         db.session.commit()
+        list_cache.invalidate(current_user.id)
+        replica.mark_write()
         
         flash(f'Customer "{name}" created successfully!', 'success')
         
@@ -229,17 +308,26 @@ def create_order():
             created_by=current_user.id
         )
         db.session.add(order)
-        db.session.commit()
+        db.session.flush()
+        rollups.record_orders(current_user.id, [(customer.id, order.created_at, price)])
+        search.index_orders([(order.id, current_user.id, order_name)])
         
-        # Send SMS notification
-        sms_sent = sms_service.send_order_confirmation(customer.phone, order_name, price)
+        # Queue SMS notification in the same transaction, sent by the sms-worker
+        db.session.add(SmsOutbox(
+            order_id=order.id,
+            phone=customer.phone,
+            order_name=order_name,
+            price=price
+        ))
+        bump_data_version(current_user.id)
+        db.session.commit()
+        list_cache.invalidate(current_user.id)
+        replica.mark_write()
         
-        if sms_sent:
-            flash(f'Order "{order_name}" created successfully! SMS sent to customer.', 'success')
-        else:
-            flash(f'Order "{order_name}" created successfully! But SMS failed to send.', 'warning')
+        flash(f'Order "{order_name}" created successfully! SMS confirmation queued.', 'success')
         
     except Exception as e:
+        db.session.rollback()
         flash('Error creating order. Please try again.', 'error')
     
     return redirect(url_for('main.dashboard'))
@@ -252,8 +340,13 @@ def delete_order(order_id):
         flash('You do not have permission to delete this order.', 'error')
         return redirect(url_for('main.dashboard'))
     
+    rollups.record_orders(current_user.id, [(order.customer_id, order.created_at, order.price)], sign=-1)
+    search.remove_order(order.id)
     db.session.delete(order)
+    bump_data_version(current_user.id)
     db.session.commit()
+    list_cache.invalidate(current_user.id)
+    replica.mark_write()
     flash("Order deleted successfully.", "success")
     return redirect(url_for('main.dashboard'))
 
@@ -264,22 +357,211 @@ def api_health():
     """Health check endpoint"""
     return jsonify({'status': 'healthy', 'message': 'Service is running'})
 
+@main_bp.route('/api/stats')
+@login_required
+def api_stats():
+    """API: Order counts and revenue from the rollups, grouped by day, customer or total"""
+    group_by = request.args.get('group_by', 'day')
+    if group_by not in ('day', 'customer', 'total'):
+        return jsonify({'error': 'group_by must be day, customer or total'}), 400
+    
+    try:
+        start = parse_date(request.args.get('from'))
+        end = parse_date(request.args.get('to'))
+    except ValueError:
+        return jsonify({'error': 'from and to must be YYYY-MM-DD dates'}), 400
+    
+    return jsonify({
+        'group_by': group_by,
+        'from': start.isoformat() if start else None,
+        'to': end.isoformat() if end else None,
+        'rows': rollups.stats(current_user.id, start, end, group_by)
+    })
+
+def parse_date(value):
+    return date.fromisoformat(value) if value else None
+
+@main_bp.route('/api/cache/stats')
+@login_required
+def api_cache_stats():
+    """API: List cache hit/miss counters"""
+    return jsonify(list_cache.stats())
+
+@main_bp.route('/api/metrics')
+def api_metrics():
+    """Prometheus metrics for this process"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
 @main_bp.route('/api/customers')
 @login_required
+@conditional_response('customers')
+@cached_response('customers')
 def api_get_customers():
+    """API: List customers, paged when limit or cursor is given"""
+    query = Customer.row_select().where(Customer.created_by == current_user.id)
+    
+    def serialize(customers):
+        counts = order_counts(current_user.id, [c.id for c in customers], replica.read_session())
+        return [{
+            'id': c.id,
+            'name': c.name,
+            'phone': c.phone,
+            'created_at': c.created_at.isoformat(),
+            'order_count': counts.get(c.id, 0)
+        } for c in customers]
+    
+    return list_response(query, Customer, serialize)
+
+@main_bp.route('/api/search')
+@login_required
+def api_search():
+    """API: Prefix search over the user's customers (name, phone) and orders (name)"""
+    q = request.args.get('q', '')
+    try:
+        limit = min(max(int(request.args.get('limit', search.SEARCH_LIMIT)), 1), MAX_LIMIT)
+    except ValueError:
+        return jsonify({'error': 'Invalid limit'}), 400
     
-    customers = Customer.query.filter_by(created_by=current_user.id).all()
-    return jsonify([{
-        'id': c.id,
-        'name': c.name,
-        'phone': c.phone,
-        'created_at': c.created_at.isoformat(),
-        'order_count': len(c.orders)
-    } for c in customers])
+    customers, orders = search.search(current_user.id, q, limit)
+    return jsonify({
+        'customers': [{'id': c.id, 'name': c.name, 'phone': c.phone} for c in customers],
+        'orders': [o.to_dict() for o in orders]
+    })
+
+@main_bp.route('/api/customers/search')
+@login_required
+def api_search_customers():
+    """API: Name or phone prefix lookup for the dashboard customer picker"""
+    customers = search.search_customers(current_user.id, request.args.get('q', ''), CUSTOMER_SEARCH_LIMIT)
+    return jsonify([{'id': c.id, 'name': c.name, 'phone': c.phone} for c in customers])
 
 @main_bp.route('/api/orders')
 @login_required
+@conditional_response('orders')
+@cached_response('orders')
 def api_get_orders():
-    """API: Get all orders for current user"""
-    orders = Order.query.filter_by(created_by=current_user.id).all()
-    return jsonify([order.to_dict() for order in orders])
\ No newline at end of file
+    """API: Get all orders for current user, paged when limit or cursor is given"""
+    query = Order.row_select().where(Order.created_by == current_user.id)
+    return list_response(query, Order, lambda rows: [Order.row_dict(row) for row in rows])
+
+@main_bp.route('/api/import', methods=['POST'])
+@login_required
+def api_import():
+    """API: Bulk import customers and orders from an uploaded CSV or JSON file"""
+    upload = request.files.get('file')
+    if upload:
+        text = upload.read().decode('utf-8-sig', errors='replace')
+        filename = upload.filename or ''
+    else:
+        text = request.get_data(as_text=True)
+        filename = ''
+    
+    import_format = request.args.get('format')
+    if not import_format:
+        is_json = filename.lower().endswith('.json') or request.mimetype == 'application/json'
+        import_format = 'json' if is_json else 'csv'
+    
+    try:
+        if import_format == 'json':
+            customers, orders = parse_json(text)
+        elif import_format == 'csv':
+            customers, orders = parse_csv(text)
+        else:
+            return jsonify({'error': 'format must be csv or json'}), 400
+    except ImportFormatError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    queue_sms = request.args.get('send_sms', '').lower() in ('1', 'true', 'yes')
+    try:
+        report = run_import(current_user.id, customers, orders, queue_sms=queue_sms)
+        list_cache.invalidate(current_user.id)
+        replica.mark_write()
+    except Exception as e:
+        db.session.rollback()
+        print(f"Import failed: {e}")
+        return jsonify({'error': 'Import failed, nothing was saved'}), 500
+    
+    return jsonify(report)
+
+@main_bp.route('/api/orders/export')
+@login_required
+def api_export_orders():
+    """API: Stream every order for current user as CSV or NDJSON"""
+    export_format = request.args.get('format', 'csv')
+    if export_format not in ('csv', 'ndjson'):
+        return jsonify({'error': 'format must be csv or ndjson'}), 400
+    
+    user_id = current_user.id
+    
+    def rows():
+        # yield_per streams from the cursor instead of loading every order
+        stmt = (Order.row_select()
+                .where(Order.created_by == user_id)
+                .order_by(Order.id)
+                .execution_options(yield_per=EXPORT_CHUNK_SIZE))
+        for row in replica.read_session().execute(stmt):
+            yield Order.row_dict(row)
+    
+    if export_format == 'csv':
+        body, mimetype = export_csv(rows()), 'text/csv'
+    else:
+        body, mimetype = export_ndjson(rows()), 'application/x-ndjson'
+    
+    return Response(
+        stream_with_context(body),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename=orders.{export_format}'}
+    )
+
+def export_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=Order.EXPORT_FIELDS)
+    writer.writeheader()
+    yield buffer.getvalue()    # header goes out before the first query round trip
+    buffer.seek(0)
+    buffer.truncate()
+    
+    for i, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if i % EXPORT_CHUNK_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+def export_ndjson(rows):
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(row) + '\n')
+        if len(lines) == EXPORT_CHUNK_SIZE:
+            yield ''.join(lines)
+            lines = []
+    yield ''.join(lines)
+
+def order_counts(user_id, customer_ids, session=None):
+    # One grouped COUNT instead of lazy loading customer.orders per row
+    if not customer_ids:
+        return {}
+    query = (session or db.session).query(Order.customer_id, func.count(Order.id)).filter(Order.created_by == user_id)
+    if len(customer_ids) <= MAX_LIMIT:
+        query = query.filter(Order.customer_id.in_(customer_ids))
+    return dict(query.group_by(Order.customer_id).all())
+
+def list_response(stmt, model, serialize):
+    # stmt selects plain columns (Model.row_select()), rows are tuples rather than ORM objects
+    reads = replica.read_session()
+    # Without paging params keep the original full-list response
+    if 'limit' not in request.args and 'cursor' not in request.args:
+        return jsonify(serialize(reads.execute(stmt).all()))
+    
+    try:
+        limit = parse_limit(request.args.get('limit'))
+        stmt = keyset_select(stmt, model, limit, request.args.get('cursor'))
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
+    
+    rows, next_cursor = trim_page(reads.execute(stmt).all(), limit)
+    return jsonify({
+        'items': serialize(rows),
+        'next_cursor': next_cursor
+    })
@@ -0,0 +1,149 @@
+"""
+Prefix search over customer names/phones and order names.
+
+On SQLite the rows are mirrored into an FTS5 table that the write routes keep
+in sync. Each row's rowid is derived from the source id (customers even,
+orders odd) so updates and deletes are point lookups. Every document
+carries an `owner` token, so a lookup only matches the current user's rows.
+Other databases fall back to lower(column) LIKE 'q%' prefix queries, served
+on PostgreSQL by the text_pattern_ops indexes declared in app/models.py.
+"""
+import re
+from sqlalchemy import DDL, event, func, text
+from sqlalchemy.orm import joinedload
+from app import db
+from app.models import Customer, Order
+
+SEARCH_LIMIT = 20
+
+CREATE_FTS = DDL(
+    "CREATE VIRTUAL TABLE IF NOT EXISTS search_index "
+    "USING fts5(owner, body, tokenize='unicode61')"
+)
+DROP_FTS = DDL("DROP TABLE IF EXISTS search_index")
+
+# create_all()/drop_all() manage the virtual table alongside the models
+event.listen(db.metadata, 'after_create', CREATE_FTS.execute_if(dialect='sqlite'))
+event.listen(db.metadata, 'before_drop', DROP_FTS.execute_if(dialect='sqlite'))
+
+def use_fts():
+    return db.session.get_bind().dialect.name == 'sqlite'
+
+def customer_rowid(customer_id):
+    return customer_id * 2
+
+def order_rowid(order_id):
+    return order_id * 2 + 1
+
+def owner_token(user_id):
+    return f'u{user_id}'
+
+def index_customers(customers):
+    """customers: iterable of (id, created_by, name, phone)"""
+    if not use_fts():
+        return
+    rows = [{'rowid': customer_rowid(cid), 'owner': owner_token(uid), 'body': f'{name} {phone}'}
+            for cid, uid, name, phone in customers]
+    if rows:
+        db.session.execute(text(
+            "INSERT OR REPLACE INTO search_index(rowid, owner, body) VALUES (:rowid, :owner, :body)"), rows)
+
+def index_orders(orders):
+    """orders: iterable of (id, created_by, order_name)"""
+    if not use_fts():
+        return
+    rows = [{'rowid': order_rowid(oid), 'owner': owner_token(uid), 'body': order_name}
+            for oid, uid, order_name in orders]
+    if rows:
+        db.session.execute(text(
+            "INSERT OR REPLACE INTO search_index(rowid, owner, body) VALUES (:rowid, :owner, :body)"), rows)
+
+def remove_order(order_id):
+    if use_fts():
+        db.session.execute(text("DELETE FROM search_index WHERE rowid = :rowid"),
+                           {'rowid': order_rowid(order_id)})
+
+def rebuild(conn=None):
+    """Repopulate the FTS table from the customer and order tables"""
+    execute = conn.execute if conn is not None else db.session.execute
+    execute(CREATE_FTS)
+    execute(text("DELETE FROM search_index"))
+    execute(text(
+        "INSERT INTO search_index(rowid, owner, body) "
+        "SELECT id * 2, 'u' || created_by, name || ' ' || phone FROM customer"))
+    execute(text(
+        "INSERT INTO search_index(rowid, owner, body) "
+        'SELECT id * 2 + 1, \'u\' || created_by, order_name FROM "order"'))
+
+def match_expression(user_id, q):
+    # every word becomes a quoted prefix term, so user input can't inject FTS syntax
+    words = re.findall(r'\w+', q)
+    if not words:
+        return None
+    terms = ' AND '.join(f'body : "{word}"*' for word in words)
+    return f'owner : "{owner_token(user_id)}" AND {terms}'
+
+def match_rowids(user_id, q, limit, customers_only=False):
+    expression = match_expression(user_id, q)
+    if expression is None:
+        return []
+    # customer rowids are even
+    only = " AND rowid % 2 = 0" if customers_only else ""
+    return db.session.execute(text(
+        f"SELECT rowid FROM search_index WHERE search_index MATCH :q{only} ORDER BY rank LIMIT :limit"),
+        {'q': expression, 'limit': limit}).scalars().all()
+
+def search(user_id, q, limit=SEARCH_LIMIT):
+    """Matching customers and orders for the user, best matches first"""
+    if not use_fts():
+        return prefix_search(user_id, q, limit)
+
+    rowids = match_rowids(user_id, q, limit)
+    customer_ids = [r // 2 for r in rowids if r % 2 == 0]
+    order_ids = [r // 2 for r in rowids if r % 2 == 1]
+    customers = load_in_order(Customer, customer_ids, Customer.query)
+    orders = load_in_order(Order, order_ids, Order.query.options(joinedload(Order.customer)))
+    # the owner check is repeated against the real rows in case the index drifted
+    return ([c for c in customers if c.created_by == user_id],
+            [o for o in orders if o.created_by == user_id])
+
+def load_in_order(model, ids, query):
+    if not ids:
+        return []
+    by_id = {row.id: row for row in query.filter(model.id.in_(ids))}
+    return [by_id[i] for i in ids if i in by_id]
+
+def prefix_pattern(q):
+    # LIKE wildcards typed by the user match literally
+    return q.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+
+def starts_with(column, q):
+    """Case-insensitive prefix match, lower(column) so an expression index can serve it"""
+    return func.lower(column).like(func.lower(prefix_pattern(q)), escape='\\')
+
+def search_customers(user_id, q, limit=SEARCH_LIMIT):
+    """Customers matching q, the same way search() matches them"""
+    if not use_fts():
+        return prefix_customers(user_id, q, limit)
+    ids = [r // 2 for r in match_rowids(user_id, q, limit, customers_only=True)]
+    return [c for c in load_in_order(Customer, ids, Customer.query) if c.created_by == user_id]
+
+def prefix_customers(user_id, q, limit):
+    """Customers whose name or phone starts with q, by name"""
+    q = q.strip()
+    if not q:
+        return []
+    return (Customer.query
+            .filter(Customer.created_by == user_id)
+            .filter(db.or_(starts_with(Customer.name, q),
+                           Customer.phone.like(prefix_pattern(q), escape='\\')))
+            .order_by(Customer.name).limit(limit).all())
+
+def prefix_search(user_id, q, limit):
+    q = q.strip()
+    if not q:
+        return [], []
+    orders = (Order.query.options(joinedload(Order.customer))
+              .filter(Order.created_by == user_id, starts_with(Order.order_name, q))
+              .order_by(Order.order_name).limit(limit).all())
+    return prefix_customers(user_id, q, limit), orders
@@ -1,9 +1,13 @@
 import os
-import requests
-import json
+import time
 from urllib.parse import urlencode
+from app import metrics
+from app.http_client import get_client
 
 class SMSService:
+    bulk_limit = 100              # recipients per bulk request
+    success_codes = (100, 101, 102)   # Processed, Sent, Queued
+    
     def __init__(self):
         self.username = os.getenv('AFRICASTALKING_USERNAME')
         self.api_key = os.getenv('AFRICASTALKING_API_KEY')
@@ -16,22 +20,53 @@ class SMSService:
             not any(x in self.api_key.lower() for x in ['your_', 'demo'])
         )
     
+    @property
+    def client(self):
+        # Shared pooled client with timeouts and a circuit breaker for the AT API
+        return get_client('africastalking')
+    
     def send_order_confirmation(self, phone_number, order_name, price):
         if not self.valid_credentials:
             return self.demo_send(phone_number, order_name, price)
         
         return self.live_send(phone_number, order_name, price)
     
+    def send_many(self, messages):
+        # messages: [(phone, order_name, price), ...] -> [bool, ...] in the same order
+        started = time.perf_counter()
+        results = self.dispatch(messages)
+        metrics.record_sms(time.perf_counter() - started, results)
+        return results
+    
+    def dispatch(self, messages):
+        if not self.valid_credentials:
+            return [self.demo_send(*m) for m in messages]
+        
+        # Group recipients that share a message body into one bulk call
+        groups = {}
+        for i, (phone_number, order_name, price) in enumerate(messages):
+            message = self.format_message(order_name, price)
+            groups.setdefault(message, []).append((i, self.format_phone_number(phone_number)))
+        
+        results = [False] * len(messages)
+        for message, recipients in groups.items():
+            for start in range(0, len(recipients), self.bulk_limit):
+                chunk = recipients[start:start + self.bulk_limit]
+                statuses = self.bulk_send([phone for _, phone in chunk], message)
+                for i, phone in chunk:
+                    results[i] = statuses.get(phone, False)
+        return results
+    
     def live_send(self, phone_number, order_name, price):
-        # Send SMS using AT API
+        return self.send_many([(phone_number, order_name, price)])[0]
+    
+    def bulk_send(self, phones, message):
+        # Send one message to many numbers using AT API, returns {phone: delivered}
         try:
-            formatted_phone = self.format_phone_number(phone_number)
-            message = f"ORDER CONFIRMATION: {order_name} - ${price:.2f}. Thank you for your order!"
-            
             # Prepare data for Africa's Talking 
             data = {
                 'username': self.username,
-                'to': formatted_phone,
+                'to': ','.join(phones),
                 'message': message,
                 'from': ''
             }
@@ -42,21 +77,38 @@ class SMSService:
                 'Accept': 'application/json'
             }
             
-            # Send request
-            response = requests.post(
+            # Send request over the shared keep-alive session, fails fast while AT is down
+            response = self.client.post(
                 f"{self.api_url}/bulk",
                 data=urlencode(data),
-                headers=headers,
-                timeout=30
+                headers=headers
             )
             
             print(f"Africa's Talking Response: {response.status_code} - {response.text}")
             
-            return response.status_code in [200, 201, 202]
+            if response.status_code not in [200, 201, 202]:
+                return {}
+            return self.parse_recipients(response, phones)
             
         except Exception as e:
             print(f"SMS sending error: {e}")
-            return False
+            return {}
+    
+    def parse_recipients(self, response, phones):
+        # Per-recipient status from SMSMessageData.Recipients; 100-102 are accepted
+        try:
+            recipients = response.json()['SMSMessageData']['Recipients']
+        except Exception:
+            # No usable body, trust the HTTP status for every number
+            return {phone: True for phone in phones}
+        
+        return {
+            r.get('number'): r.get('statusCode') in self.success_codes
+            for r in recipients
+        }
+    
+    def format_message(self, order_name, price):
+        return f"ORDER CONFIRMATION: {order_name} - ${price:.2f}. Thank you for your order!"
     
     def demo_send(self, phone_number, order_name, price):
         formatted_phone = self.format_phone_number(phone_number)
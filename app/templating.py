@@ -0,0 +1,55 @@
+"""
+Template compilation and fragment caching.
+
+Compiled templates go to a filesystem bytecode cache shared by every worker,
+so only the first process to load a template pays for compiling it (`flask
+warm-templates` does that once at deploy). The `{% cache %}` tag stores a
+rendered block in the per-user list cache:
+
+    {% cache 'orders_table', data_version, orders_cursor %} ... {% endcache %}
+
+Include the user's data version in the key; a write bumps it, so a changed
+table is never served from an old entry.
+"""
+from flask import current_app
+from flask_login import current_user
+from jinja2 import FileSystemBytecodeCache, nodes
+from jinja2.ext import Extension
+from app.cache import list_cache
+
+class FragmentCacheExtension(Extension):
+    tags = {'cache'}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        key = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            key.append(parser.parse_expression())
+        body = parser.parse_statements(['name:endcache'], drop_needle=True)
+        call = self.call_method('_render_cached', [nodes.List(key)])
+        return nodes.CallBlock(call, [], [], body).set_lineno(lineno)
+
+    def _render_cached(self, key, caller):
+        return cached_fragment(key, caller)
+
+def cached_fragment(key, render):
+    """render() output for the current user, cached under key"""
+    if not current_app.config.get('LIST_CACHE_ENABLED', True) or not current_user.is_authenticated:
+        return render()
+    return list_cache.get_or_set(current_user.id, ('fragment',) + tuple(str(part) for part in key), render)
+
+def init_templates(app):
+    """Register the cache tag and the bytecode cache before Jinja is first used"""
+    options = dict(app.jinja_options)
+    options['extensions'] = list(options.get('extensions', [])) + [FragmentCacheExtension]
+    if app.config['JINJA_BYTECODE_CACHE']:
+        # Jinja's default directory is a per-user folder under the system temp dir
+        options['bytecode_cache'] = FileSystemBytecodeCache(app.config['JINJA_CACHE_DIR'])
+    app.jinja_options = options
+
+def warm_templates(app):
+    """Compile every template so its bytecode is cached, returns the count"""
+    names = app.jinja_env.list_templates(filter_func=lambda name: name.endswith('.html'))
+    for name in names:
+        app.jinja_env.get_template(name)
+    return len(names)
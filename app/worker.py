@@ -0,0 +1,65 @@
+import time
+from datetime import datetime, timedelta
+from app import db
+from app.models import SmsOutbox
+from app.services import sms_service
+
+BATCH_SIZE = 50
+MAX_ATTEMPTS = 5
+BASE_DELAY = 30       # seconds before the first retry
+MAX_DELAY = 3600      # backoff cap in seconds
+
+def backoff_delay(attempts, base_delay=BASE_DELAY, max_delay=MAX_DELAY):
+    """Exponential backoff for the given number of failed attempts"""
+    return min(base_delay * (2 ** (attempts - 1)), max_delay)
+
+def fetch_pending(batch_size=BATCH_SIZE, now=None):
+    """Pending outbox rows that are due, oldest first"""
+    now = now or datetime.utcnow()
+    return (SmsOutbox.query
+            .filter(SmsOutbox.status == 'pending', SmsOutbox.next_attempt_at <= now)
+            .order_by(SmsOutbox.next_attempt_at, SmsOutbox.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+            .all())
+
+def drain_outbox(batch_size=BATCH_SIZE, max_attempts=MAX_ATTEMPTS, base_delay=BASE_DELAY):
+    """Send one batch of due messages. Returns (sent, failed) counts."""
+    rows = fetch_pending(batch_size)
+    sent = failed = 0
+
+    try:
+        results = sms_service.send_many([(r.phone, r.order_name, r.price) for r in rows]) if rows else []
+        error = 'provider rejected message'
+    except Exception as e:
+        results, error = [False] * len(rows), str(e)[:255]
+
+    now = datetime.utcnow()
+    for row, ok in zip(rows, results):
+        row.attempts += 1
+        if ok:
+            row.status = 'sent'
+            row.sent_at = now
+            row.last_error = None
+            sent += 1
+        else:
+            row.last_error = error
+            if row.attempts >= max_attempts:
+                row.status = 'failed'
+            else:
+                row.next_attempt_at = now + timedelta(seconds=backoff_delay(row.attempts, base_delay))
+            failed += 1
+
+    db.session.commit()
+    return sent, failed
+
+def run_worker(batch_size=BATCH_SIZE, max_attempts=MAX_ATTEMPTS, poll_interval=5, once=False):
+    """Drain the outbox until empty (once) or forever, sleeping between empty polls"""
+    while True:
+        sent, failed = drain_outbox(batch_size, max_attempts)
+        if sent or failed:
+            print(f"sms-worker: sent={sent} failed={failed}")
+        if sent + failed < batch_size:
+            if once:
+                return
+            time.sleep(poll_interval)
@@ -0,0 +1,5 @@
+# ASGI entry point, see app/async_api.py
+#   uvicorn asgi:app --host 0.0.0.0 --port 5000
+from app.async_api import create_asgi_app
+
+app = create_asgi_app()
@@ -0,0 +1,256 @@
+"""
+Endpoint benchmarks.
+
+Seeds a throwaway SQLite database with users x customers x orders through
+the models, then drives the hot endpoints through the Flask test client
+with SMS stubbed out. Prints one JSON document with latency percentiles,
+throughput, SQL statements, response bytes and CPU time per request for
+each endpoint, plus the per-row cost of serializing the user's orders from
+ORM objects vs plain rows. Requests send Accept-Encoding: gzip unless
+--encoding identity is given.
+
+    python run_tests.py bench
+    python bench.py --users 2 --customers 200 --orders 20 --requests 300 --output bench.json
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ENDPOINTS = ['dashboard', 'api_orders', 'api_customers', 'create_order']
+
+def percentile(sorted_values, pct):
+    # nearest-rank percentile of an already sorted list
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100.0 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+def summarize(latencies, statements, elapsed, body_bytes=(), cpu_seconds=()):
+    ordered = sorted(latencies)
+    ms = lambda seconds: round(seconds * 1000, 3)
+    return {
+        'requests': len(latencies),
+        'p50_ms': ms(percentile(ordered, 50)),
+        'p95_ms': ms(percentile(ordered, 95)),
+        'p99_ms': ms(percentile(ordered, 99)),
+        'mean_ms': ms(sum(ordered) / len(ordered)) if ordered else 0.0,
+        'throughput_rps': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'sql_per_request': round(sum(statements) / len(statements), 2) if statements else 0.0,
+        'bytes_per_response': round(sum(body_bytes) / len(body_bytes)) if body_bytes else 0,
+        'cpu_ms_per_request': ms(sum(cpu_seconds) / len(cpu_seconds)) if cpu_seconds else 0.0,
+    }
+
+def create_bench_app(db_path, use_cache):
+    from app import create_app
+    previous = os.environ.get('DATABASE_URL')
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+    try:
+        app = create_app(create_schema=True)
+    finally:
+        if previous is None:
+            del os.environ['DATABASE_URL']
+        else:
+            os.environ['DATABASE_URL'] = previous
+    app.config.update(TESTING=True, LIST_CACHE_ENABLED=use_cache)
+    return app
+
+def seed(app, users, customers, orders):
+    """Insert the dataset through the models, returns the user ids"""
+    from app import db, rollups
+    from app.models import User, Customer, Order
+
+    user_ids = []
+    start = datetime.utcnow() - timedelta(days=365)
+    with app.app_context():
+        for u in range(users):
+            user = User(google_id=f'bench-{u}', email=f'bench{u}@example.com', name=f'Bench User {u}')
+            db.session.add(user)
+            db.session.flush()
+            for c in range(customers):
+                customer = Customer(name=f'Customer {u}-{c}', phone=f'07{c:08d}', created_by=user.id,
+                                    created_at=start + timedelta(minutes=c))
+                db.session.add(customer)
+                db.session.flush()
+                db.session.add_all([
+                    Order(order_name=f'Item {o}', price=1 + (o % 50), customer_id=customer.id,
+                          created_by=user.id, created_at=start + timedelta(minutes=c, seconds=o))
+                    for o in range(orders)
+                ])
+            db.session.commit()
+            user_ids.append(user.id)
+        rollups.rebuild()
+        db.session.commit()
+    return user_ids
+
+def login(client, user_id):
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(user_id)
+        sess['_fresh'] = True
+
+def make_requests(app, user_id, encoding='gzip'):
+    """endpoint name -> callable issuing one request against the test client"""
+    from app.models import Customer
+    with app.app_context():
+        customer_id = Customer.query.filter_by(created_by=user_id).first().id
+
+    client = app.test_client()
+    login(client, user_id)
+    order_form = {'order_name': 'Bench order', 'price': '9.99', 'customer_id': customer_id}
+    headers = {'Accept-Encoding': encoding}
+    return {
+        'dashboard': lambda: client.get('/dashboard', headers=headers),
+        'api_orders': lambda: client.get('/api/orders', headers=headers),
+        'api_customers': lambda: client.get('/api/customers', headers=headers),
+        'create_order': lambda: client.post('/order', data=order_form, headers=headers),
+    }
+
+def measure(app, request, count, warmup):
+    from sqlalchemy import event
+    from app import db
+
+    with app.app_context():
+        engine = db.engine
+
+    statements = [0]
+    def count_statement(*args):
+        statements[0] += 1
+
+    for _ in range(warmup):
+        request()
+
+    latencies, per_request, body_bytes, cpu = [], [], [], []
+    event.listen(engine, 'before_cursor_execute', count_statement)
+    try:
+        started = time.perf_counter()
+        for _ in range(count):
+            statements[0] = 0
+            t0, c0 = time.perf_counter(), time.process_time()
+            response = request()
+            latencies.append(time.perf_counter() - t0)
+            cpu.append(time.process_time() - c0)
+            per_request.append(statements[0])
+            # the body as sent, i.e. compressed when the response is gzipped
+            body_bytes.append(len(response.get_data()))
+            if response.status_code >= 400:
+                raise RuntimeError(f'{response.request.path} returned {response.status_code}')
+        elapsed = time.perf_counter() - started
+    finally:
+        event.remove(engine, 'before_cursor_execute', count_statement)
+
+    return summarize(latencies, per_request, elapsed, body_bytes, cpu)
+
+def measure_rows(app, user_id, repeat):
+    """
+    Per-row cost of building the /api/orders body for every order of the user:
+    ORM objects + to_dict() + stdlib JSON (the old path) against a Core select
+    of columns + row_dict() + the app's JSON provider. Best of `repeat` runs.
+    """
+    from flask.json.provider import DefaultJSONProvider
+    from sqlalchemy.orm import joinedload
+    from app import db
+    from app.models import Order
+
+    stdlib_json = DefaultJSONProvider(app)
+
+    def orm_objects():
+        orders = Order.query.filter_by(created_by=user_id).options(joinedload(Order.customer)).all()
+        stdlib_json.response([order.to_dict() for order in orders])
+        return len(orders)
+
+    def column_rows():
+        rows = db.session.execute(Order.row_select().where(Order.created_by == user_id)).all()
+        app.json.response([Order.row_dict(row) for row in rows])
+        return len(rows)
+
+    results = {}
+    with app.app_context():
+        for name, build in (('orm_objects', orm_objects), ('column_rows', column_rows)):
+            best, rows = None, 0
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                rows = build()
+                elapsed = time.perf_counter() - t0
+                best = elapsed if best is None else min(best, elapsed)
+                db.session.remove()     # a fresh identity map per run, like per request
+            results[name] = {'rows': rows, 'total_ms': round(best * 1000, 3),
+                             'us_per_row': round(best * 1e6 / rows, 3) if rows else 0.0}
+
+    orm, columns = results['orm_objects']['us_per_row'], results['column_rows']['us_per_row']
+    results['speedup'] = round(orm / columns, 2) if columns else 0.0
+    return results
+
+@contextlib.contextmanager
+def stubbed_sms():
+    # instance attributes shadow the methods until they are deleted again
+    from app.services import sms_service
+    sms_service.send_order_confirmation = lambda phone, name, price: True
+    sms_service.send_many = lambda messages: [True] * len(messages)
+    try:
+        yield
+    finally:
+        del sms_service.send_order_confirmation
+        del sms_service.send_many
+
+def run(args):
+    with tempfile.TemporaryDirectory() as tmp, stubbed_sms():
+        app = create_bench_app(os.path.join(tmp, 'bench.db'), args.cache)
+
+        seed_started = time.perf_counter()
+        user_ids = seed(app, args.users, args.customers, args.orders)
+        seed_seconds = time.perf_counter() - seed_started
+
+        requests = make_requests(app, user_ids[0], args.encoding)
+        results = {}
+        for name in args.endpoints:
+            results[name] = measure(app, requests[name], args.requests, args.warmup)
+        rows = measure_rows(app, user_ids[0], args.row_repeat)
+
+    return {
+        'timestamp': datetime.utcnow().isoformat() + 'Z',
+        'python': platform.python_version(),
+        'dataset': {
+            'users': args.users,
+            'customers_per_user': args.customers,
+            'orders_per_customer': args.orders,
+            'seed_seconds': round(seed_seconds, 2),
+        },
+        'settings': {'requests': args.requests, 'warmup': args.warmup, 'list_cache': args.cache,
+                     'accept_encoding': args.encoding},
+        'endpoints': results,
+        'order_rows': rows,
+    }
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the hot endpoints')
+    parser.add_argument('--users', type=int, default=2)
+    parser.add_argument('--customers', type=int, default=100, help='customers per user')
+    parser.add_argument('--orders', type=int, default=10, help='orders per customer')
+    parser.add_argument('--requests', type=int, default=200, help='measured requests per endpoint')
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--cache', action='store_true', help='keep the per-user list cache on')
+    parser.add_argument('--encoding', choices=['gzip', 'identity'], default='gzip',
+                        help='Accept-Encoding sent with every request')
+    parser.add_argument('--endpoints', nargs='+', choices=ENDPOINTS, default=ENDPOINTS)
+    parser.add_argument('--row-repeat', type=int, default=5, help='runs of the per-row serialization comparison')
+    parser.add_argument('--output', help='also write the JSON report to this file')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    # app logging goes to stderr so stdout is only the JSON report
+    with contextlib.redirect_stdout(sys.stderr):
+        report = json.dumps(run(args), indent=2)
+    print(report)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(report + '\n')
+
+if __name__ == '__main__':
+    sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+    main()
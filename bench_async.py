@@ -0,0 +1,171 @@
+"""
+WSGI vs ASGI benchmark for the polling endpoints.
+
+Seeds a throwaway SQLite database like bench.py, then has --clients
+concurrent pollers hit each endpoint through both serving paths in one
+process: the Flask app on a pool of --threads worker threads (what one
+gunicorn gthread worker has) and the Starlette app from app/async_api.py on
+a single event loop. Latency is measured from the client, so time spent
+waiting for a free worker thread is included. Prints one JSON document.
+
+    python run_tests.py bench-async
+    python bench_async.py --clients 200 --threads 4 --requests 2000 --output bench_async.json
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from bench import create_bench_app, seed, summarize
+
+ENDPOINTS = {
+    'api_health': '/api/health',
+    'api_orders': '/api/orders',
+    'api_customers': '/api/customers',
+}
+
+def session_cookie(app, user_id):
+    serializer = app.session_interface.get_signing_serializer(app)
+    value = serializer.dumps({'_user_id': str(user_id), '_fresh': True})
+    return {app.config['SESSION_COOKIE_NAME']: value}
+
+def poll_summary(latencies, elapsed, errors, body_bytes, cpu_seconds):
+    # the pollers overlap, so per-request CPU deltas would count each other's work;
+    # report the process CPU of the whole run shared over its requests instead
+    per_request_cpu = [cpu_seconds / len(latencies)] if latencies else []
+    result = summarize(latencies, [], elapsed, body_bytes, per_request_cpu)
+    del result['sql_per_request']
+    result['errors'] = errors
+    return result
+
+async def drive(send, path, clients, count):
+    """clients concurrent pollers issuing count requests in total"""
+    latencies, body_bytes, errors = [], [], [0]
+    remaining = [count]
+
+    async def poller():
+        while remaining[0] > 0:
+            remaining[0] -= 1
+            t0 = time.perf_counter()
+            status, size = await send(path)
+            latencies.append(time.perf_counter() - t0)
+            body_bytes.append(size)
+            if status >= 400:
+                errors[0] += 1
+
+    started, cpu_started = time.perf_counter(), time.process_time()
+    await asyncio.gather(*(poller() for _ in range(clients)))
+    return poll_summary(latencies, time.perf_counter() - started, errors[0],
+                        body_bytes, time.process_time() - cpu_started)
+
+async def bench_wsgi(app, cookies, path, args):
+    import httpx
+
+    local = threading.local()
+    def request(path):
+        # one client per worker thread, like a thread handling its own connection
+        if not hasattr(local, 'client'):
+            local.client = httpx.Client(transport=httpx.WSGITransport(app=app),
+                                        base_url='http://bench', cookies=cookies)
+        response = local.client.get(path)
+        # bytes as sent, before httpx decodes any Content-Encoding
+        return response.status_code, response.num_bytes_downloaded
+
+    loop = asyncio.get_running_loop()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        async def send(path):
+            return await loop.run_in_executor(pool, request, path)
+        await drive(send, path, args.threads, args.warmup)
+        return await drive(send, path, args.clients, args.requests)
+
+async def bench_asgi(asgi_app, cookies, path, args):
+    import httpx
+
+    transport = httpx.ASGITransport(app=asgi_app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://bench', cookies=cookies) as client:
+        async def send(path):
+            response = await client.get(path)
+            return response.status_code, response.num_bytes_downloaded
+        await drive(send, path, args.clients, args.warmup)
+        return await drive(send, path, args.clients, args.requests)
+
+async def compare(app, user_id, args):
+    from app.async_api import create_asgi_app
+
+    asgi_app = create_asgi_app(app)
+    cookies = session_cookie(app, user_id)
+    query = f'?limit={args.limit}' if args.limit else ''
+    results = {}
+    try:
+        for name in args.endpoints:
+            path = ENDPOINTS[name] + ('' if name == 'api_health' else query)
+            results[name] = {
+                'wsgi': await bench_wsgi(app, cookies, path, args),
+                'asgi': await bench_asgi(asgi_app, cookies, path, args),
+            }
+    finally:
+        await asgi_app.state.api.engine.dispose()
+    return results
+
+def run(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_bench_app(os.path.join(tmp, 'bench.db'), use_cache=False)
+        user_ids = seed(app, args.users, args.customers, args.orders)
+        results = asyncio.run(compare(app, user_ids[0], args))
+        with app.app_context():
+            from app import db
+            db.engine.dispose()
+
+    return {
+        'timestamp': datetime.utcnow().isoformat() + 'Z',
+        'python': platform.python_version(),
+        'dataset': {
+            'users': args.users,
+            'customers_per_user': args.customers,
+            'orders_per_customer': args.orders,
+        },
+        'settings': {
+            'clients': args.clients,
+            'wsgi_threads': args.threads,
+            'requests': args.requests,
+            'warmup': args.warmup,
+            'limit': args.limit,
+        },
+        'endpoints': results,
+    }
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Compare the WSGI and ASGI read paths under concurrent polling')
+    parser.add_argument('--users', type=int, default=2)
+    parser.add_argument('--customers', type=int, default=100, help='customers per user')
+    parser.add_argument('--orders', type=int, default=10, help='orders per customer')
+    parser.add_argument('--clients', type=int, default=100, help='concurrent pollers')
+    parser.add_argument('--threads', type=int, default=4, help='WSGI worker threads')
+    parser.add_argument('--requests', type=int, default=1000, help='measured requests per endpoint and path')
+    parser.add_argument('--warmup', type=int, default=20)
+    parser.add_argument('--limit', type=int, default=50, help='page size for the list endpoints, 0 for full lists')
+    parser.add_argument('--endpoints', nargs='+', choices=list(ENDPOINTS), default=list(ENDPOINTS))
+    parser.add_argument('--output', help='also write the JSON report to this file')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    # app logging goes to stderr so stdout is only the JSON report
+    with contextlib.redirect_stdout(sys.stderr):
+        report = json.dumps(run(args), indent=2)
+    print(report)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(report + '\n')
+
+if __name__ == '__main__':
+    sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+    main()
@@ -3,6 +3,23 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+def is_sqlite(uri):
+    return uri.startswith('sqlite')
+
+def engine_options(uri, settings):
+    """SQLALCHEMY_ENGINE_OPTIONS for the given database URI"""
+    if is_sqlite(uri):
+        # sqlite3's own lock wait, kept in line with the busy_timeout pragma
+        return {'connect_args': {'timeout': settings['SQLITE_PRAGMAS']['busy_timeout'] / 1000}}
+
+    return {
+        'pool_size': settings['DB_POOL_SIZE'],
+        'max_overflow': settings['DB_MAX_OVERFLOW'],
+        'pool_timeout': settings['DB_POOL_TIMEOUT'],
+        'pool_recycle': settings['DB_POOL_RECYCLE'],
+        'pool_pre_ping': True,
+    }
+
 class Config:
     SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret-key')
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', 'sqlite:///orderapp.db')
@@ -10,4 +27,43 @@ class Config:
     GOOGLE_CLIENT_ID = os.getenv('CLIENT_ID')
     GOOGLE_CLIENT_SECRET = os.getenv('CLIENT_SECRET')
     AFRICASTALKING_USERNAME = os.getenv('AFRICASTALKING_USERNAME' )
-    AFRICASTALKING_API_KEY = os.getenv('AFRICASTALKING_API_KEY')
\ No newline at end of file
+    AFRICASTALKING_API_KEY = os.getenv('AFRICASTALKING_API_KEY')
+    
+    # create_all() + migrations inside create_app(); off by default, use `flask init-db`
+    AUTO_CREATE_SCHEMA = os.getenv('AUTO_CREATE_SCHEMA', '0') == '1'
+
+    # Compiled templates are cached on disk and shared by workers; the directory
+    # defaults to a per-user folder under the system temp dir
+    JINJA_BYTECODE_CACHE = os.getenv('JINJA_BYTECODE_CACHE', '1') == '1'
+    JINJA_CACHE_DIR = os.getenv('JINJA_CACHE_DIR')
+
+    # gzip for clients that accept it; bodies under COMPRESS_MIN_SIZE bytes are sent as is
+    COMPRESS_ENABLED = os.getenv('COMPRESS_ENABLED', '1') == '1'
+    COMPRESS_LEVEL = int(os.getenv('COMPRESS_LEVEL', '6'))          # 1 fastest .. 9 smallest
+    COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', '500'))
+
+    # Log requests slower than this many milliseconds, unset to disable
+    SLOW_REQUEST_MS = float(os.getenv('SLOW_REQUEST_MS')) if os.getenv('SLOW_REQUEST_MS') else None
+
+    # Applied to every new SQLite connection: WAL lets readers run alongside a
+    # writer, busy_timeout makes writers wait instead of failing with
+    # "database is locked"
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT', '5000')),   # ms
+        'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024))),
+        'cache_size': int(os.getenv('SQLITE_CACHE_SIZE', '-64000')),     # negative = KiB
+    }
+
+    # Optional read replica for the heavy GET views, see app/replica.py. Keep the
+    # sticky window above the replica's usual lag so users see their own writes
+    REPLICA_DATABASE_URL = os.getenv('REPLICA_DATABASE_URL')
+    REPLICA_STICKY_SECONDS = float(os.getenv('REPLICA_STICKY_SECONDS', '5'))
+    REPLICA_RETRY_SECONDS = float(os.getenv('REPLICA_RETRY_SECONDS', '30'))
+
+    # Connection pool for server databases (DATABASE_URL=postgresql://...)
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '10'))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '20'))
+    DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', '30'))
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '1800'))
@@ -0,0 +1,38 @@
+# Production server settings, every value can be overridden from the environment.
+#   gunicorn -c gunicorn.conf.py wsgi:app
+import multiprocessing
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+
+# Worker processes for CPU, threads per worker for requests waiting on the DB or network
+workers = int(os.getenv('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+worker_class = 'gthread' if threads > 1 else 'sync'
+
+# Import the app once in the master so workers fork warm
+preload_app = os.getenv('GUNICORN_PRELOAD', '1') == '1'
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '30'))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '5'))
+
+# Recycle workers periodically to cap slow memory growth, jittered so they don't restart together
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '1000'))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', '100'))
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-')
+errorlog = os.getenv('GUNICORN_ERROR_LOG', '-')
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
+
+def post_fork(server, worker):
+    # Connections opened in the master during preload must not be shared with
+    # the children; drop them from this worker's pool without closing the
+    # parent's sockets so each worker opens its own.
+    from app import db
+    from app.replica import replica_engine
+    app = worker.app.wsgi()
+    with app.app_context():
+        db.engine.dispose(close=False)
+    if replica_engine(app) is not None:
+        replica_engine(app).dispose(close=False)
@@ -1,6 +1,12 @@
+import os
+
+# The development entry point keeps creating the schema on boot
+os.environ.setdefault('AUTO_CREATE_SCHEMA', '1')
+
 from app import create_app
 
 app = create_app()
 
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    # Development server only, production runs under gunicorn (see gunicorn.conf.py)
+    app.run(debug=os.getenv('FLASK_DEBUG', '0') == '1')
@@ -50,6 +50,12 @@ def run_pytest(python_exec, args):
             print(e.stderr.splitlines()[-1])  # last error line
         return False
 
+def run_bench(python_exec, args, script="bench.py"):
+    # extra args go straight to the script, e.g. --customers 500 --output bench.json
+    cmd = [python_exec, script] + args
+    print(f"\n=== Running: {' '.join(cmd)} ===\n", file=sys.stderr)
+    return subprocess.run(cmd).returncode == 0
+
 def clean_artifacts():
     for path in [".pytest_cache", "htmlcov", ".coverage", "coverage.xml"]:
         shutil.rmtree(path, ignore_errors=True)
@@ -61,9 +67,9 @@ def clean_artifacts():
 def main():
     parser = argparse.ArgumentParser(description="Customer Order API Test Runner")
     parser.add_argument("command", nargs="?", default="all",
-                        choices=["all","fast","models","routes","services","init","coverage","clean"],
+                        choices=["all","fast","models","routes","services","init","worker","migrations","startup","coverage","clean","bench","bench-async"],
                         help="Test command to run (default: all)")
-    args = parser.parse_args()
+    args, extra = parser.parse_known_args()
 
     python_exec = ensure_venv()
 
@@ -74,11 +80,18 @@ def main():
         "routes": ["tests/test_routes.py", "-q", "--disable-warnings"],
         "services": ["tests/test_services.py", "-q", "--disable-warnings"],
         "init": ["tests/test_init.py", "-q", "--disable-warnings"],
+        "worker": ["tests/test_worker.py", "-q", "--disable-warnings"],
+        "migrations": ["tests/test_migrations.py", "-q", "--disable-warnings"],
+        "startup": ["tests/test_startup.py", "-q", "-s", "--disable-warnings"],
         "coverage": ["tests/", "--cov=app", "--cov-report=html", "--cov-report=term-missing", "-q", "--disable-warnings"]
     }
 
     if args.command == "clean":
         success = clean_artifacts()
+    elif args.command == "bench":
+        success = run_bench(python_exec, extra)
+    elif args.command == "bench-async":
+        success = run_bench(python_exec, extra, "bench_async.py")
     else:
         success = run_pytest(python_exec, pytest_args[args.command])
 
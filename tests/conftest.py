@@ -5,19 +5,28 @@ from app import create_app, db
 
 
 @pytest.fixture
-def app():
+def app(tmp_path_factory, monkeypatch):
+    # the engine is built inside create_app(), so the URL has to be set before it;
+    # a file rather than :memory: so the async tests can open it too
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path_factory.mktemp('db') / 'test.db'}")
     app = create_app()
     app.config.update({
         "TESTING": True,
         "WTF_CSRF_ENABLED": False,
-        "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:"
     })
     with app.app_context():
         db.create_all()
         yield app
         db.session.remove()
         db.drop_all()
+        db.engine.dispose()
 
 @pytest.fixture
 def client(app):
     return app.test_client()
+
+@pytest.fixture
+def stub_server():
+    from tests.stub_server import StubServer
+    with StubServer() as server:
+        yield server
@@ -0,0 +1,73 @@
+"""
+Local HTTP stub for testing outbound calls offline.
+
+    with StubServer() as server:
+        server.add('/bulk', status=503)
+        server.add('/bulk', status=201, body={'ok': True}, delay=0.5)
+        requests.post(server.url('/bulk'))
+
+Responses queued for a path are served in order; the last one repeats.
+Every request is recorded in server.requests as (method, path, body).
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class StubServer:
+
+    def __init__(self):
+        self.responses = {}
+        self.requests = []
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def handle_any(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length).decode() if length else ''
+                status, payload, delay = stub.next_response(self.command, self.path, body)
+                if delay:
+                    time.sleep(delay)
+                data = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+                try:
+                    self.send_response(status)
+                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Length', str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass   # client gave up (read timeout)
+
+            do_GET = do_POST = do_PUT = do_DELETE = handle_any
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def add(self, path, status=200, body=None, delay=0):
+        with self._lock:
+            self.responses.setdefault(path, []).append((status, body if body is not None else {}, delay))
+
+    def next_response(self, method, path, body):
+        with self._lock:
+            self.requests.append((method, path, body))
+            queue = self.responses.get(path) or [(404, {'error': 'no stub'}, 0)]
+            return queue.pop(0) if len(queue) > 1 else queue[0]
+
+    def url(self, path=''):
+        host, port = self.httpd.server_address
+        return f'http://{host}:{port}{path}'
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -0,0 +1,60 @@
+import os, sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import gzip
+import pytest
+from flask import url_for
+from app.assets import build_assets, init_assets
+
+CSS = "body { color: #333; }\n" * 40
+
+@pytest.mark.usefixtures("app")
+class TestAssets:
+
+    def _static(self, app, tmp_path):
+        (tmp_path / "css").mkdir()
+        (tmp_path / "css" / "style.css").write_text(CSS)
+        (tmp_path / "logo.png").write_bytes(b"\x89PNG tiny")
+        app.static_folder = str(tmp_path)
+        return build_assets(str(tmp_path))
+
+    def test_build_is_content_addressed(self, app, tmp_path):
+        manifest = self._static(app, tmp_path)
+        hashed = manifest["css/style.css"]
+        assert hashed.startswith("dist/css/style.") and hashed.endswith(".css")
+        assert gzip.decompress((tmp_path / (hashed + ".gz")).read_bytes()).decode() == CSS
+        assert not (tmp_path / (manifest["logo.png"] + ".gz")).exists()
+
+        # unchanged content keeps its name, a rebuild does not pick up its own output
+        assert build_assets(str(tmp_path)) == manifest
+        (tmp_path / "css" / "style.css").write_text(CSS + "a {}\n")
+        assert build_assets(str(tmp_path))["css/style.css"] != hashed
+
+    def test_hashed_urls_served_immutable_and_gzipped(self, app, tmp_path):
+        manifest = self._static(app, tmp_path)
+        init_assets(app)
+        with app.test_request_context():
+            url = url_for("static", filename="css/style.css")
+        assert url == "/static/" + manifest["css/style.css"]
+
+        client = app.test_client()
+        resp = client.get(url, headers={"Accept-Encoding": "gzip, deflate"})
+        assert resp.status_code == 200
+        assert resp.headers["Content-Encoding"] == "gzip"
+        assert resp.mimetype == "text/css"
+        assert "immutable" in resp.headers["Cache-Control"]
+        assert "max-age=31536000" in resp.headers["Cache-Control"]
+        assert "Accept-Encoding" in resp.headers["Vary"]
+        assert gzip.decompress(resp.data).decode() == CSS
+
+        plain = client.get(url)
+        assert "Content-Encoding" not in plain.headers
+        assert plain.get_data(as_text=True) == CSS
+
+        refused = client.get(url, headers={"Accept-Encoding": "gzip;q=0, identity"})
+        assert "Content-Encoding" not in refused.headers
+        assert refused.get_data(as_text=True) == CSS
+
+        # the unhashed name still works with Flask's default caching
+        original = client.get("/static/css/style.css")
+        assert original.status_code == 200
+        assert "immutable" not in original.headers.get("Cache-Control", "")
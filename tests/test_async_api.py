@@ -0,0 +1,135 @@
+import os, sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import asyncio
+import pytest
+
+pytest.importorskip("starlette")
+pytest.importorskip("aiosqlite")
+pytest.importorskip("a2wsgi")
+httpx = pytest.importorskip("httpx")
+
+from datetime import datetime, timedelta
+from app import db
+from app.async_api import async_database_url, create_asgi_app
+from app.models import User, Customer, Order
+
+def test_async_database_url():
+    assert str(async_database_url("sqlite:////tmp/x.db")) == "sqlite+aiosqlite:////tmp/x.db"
+    assert async_database_url("postgresql://u:p@db/app").drivername == "postgresql+asyncpg"
+    with pytest.raises(ValueError):
+        async_database_url("oracle://db/app")
+
+@pytest.fixture(autouse=True)
+def fresh_schema(app):
+    # the async engine reads the same database file, start from the current models
+    db.drop_all()
+    db.create_all()
+
+@pytest.mark.usefixtures("app")
+class TestAsyncAPI:
+
+    def _seed(self, app):
+        u = User(google_id="async", email="async@example.com", name="Async")
+        db.session.add(u)
+        db.session.flush()
+        start = datetime(2025, 1, 1)
+        for c in range(3):
+            customer = Customer(name=f"C{c}", phone=f"07000000{c}", created_by=u.id,
+                                created_at=start + timedelta(minutes=c))
+            db.session.add(customer)
+            db.session.flush()
+            db.session.add_all([Order(order_name=f"O{c}-{o}", price=1.0 + o, customer_id=customer.id,
+                                      created_by=u.id, created_at=start + timedelta(minutes=c, seconds=o))
+                                for o in range(c + 1)])
+        db.session.commit()
+        return u.id
+
+    def _cookie(self, app, user_id):
+        serializer = app.session_interface.get_signing_serializer(app)
+        return {app.config["SESSION_COOKIE_NAME"]: serializer.dumps({"_user_id": str(user_id), "_fresh": True})}
+
+    def _fetch(self, app, requests):
+        """Run (path, cookies, headers) requests against the ASGI app"""
+        asgi_app = create_asgi_app(app)
+
+        async def run():
+            transport = httpx.ASGITransport(app=asgi_app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://localhost") as client:
+                responses = []
+                for path, cookies, headers in requests:
+                    client.cookies.clear()
+                    client.cookies.update(cookies)
+                    responses.append(await client.get(path, headers=headers))
+            await asgi_app.state.api.engine.dispose()
+            return responses
+
+        return asyncio.run(run())
+
+    def test_matches_flask_responses(self, app):
+        app.config["LIST_CACHE_ENABLED"] = False
+        user_id = self._seed(app)
+        cookies = self._cookie(app, user_id)
+        paths = ["/api/health", "/api/orders", "/api/customers",
+                 "/api/orders?limit=2", "/api/customers?limit=2"]
+
+        flask_client = app.test_client()
+        with flask_client.session_transaction() as sess:
+            sess["_user_id"] = str(user_id)
+            sess["_fresh"] = True
+        expected = [flask_client.get(path) for path in paths]
+
+        # httpx asks for gzip by default, the Flask test client doesn't
+        identity = {"Accept-Encoding": "identity"}
+        responses = self._fetch(app, [(path, cookies, identity) for path in paths])
+        for path, want, got in zip(paths, expected, responses):
+            assert got.status_code == 200, path
+            assert got.content == want.data, path
+            assert got.headers.get("etag") == want.headers.get("ETag"), path
+
+        cursor = responses[3].json()["next_cursor"]
+        flask_next = flask_client.get(f"/api/orders?limit=2&cursor={cursor}")
+        async_next, bad = self._fetch(app, [(f"/api/orders?limit=2&cursor={cursor}", cookies, identity),
+                                            ("/api/orders?cursor=nope", cookies, {})])
+        assert async_next.content == flask_next.data
+        assert bad.status_code == 400
+
+    def test_etag_and_login(self, app):
+        user_id = self._seed(app)
+        cookies = self._cookie(app, user_id)
+        first, = self._fetch(app, [("/api/orders", cookies, {})])
+
+        not_modified, anonymous, forged, fallthrough = self._fetch(app, [
+            ("/api/orders", cookies, {"If-None-Match": first.headers["etag"]}),
+            ("/api/customers", {}, {}),
+            ("/api/customers", {app.config["SESSION_COOKIE_NAME"]: "forged"}, {}),
+            ("/", {}, {}),
+        ])
+        assert not_modified.status_code == 304
+        assert anonymous.status_code == 302
+        assert anonymous.headers["location"] == "/login?next=%2Fapi%2Fcustomers"
+        assert forged.status_code == 302
+        # anything else is served by the Flask app
+        assert fallthrough.status_code == 200
+
+    def test_gzipped_etag_is_weak_on_both_paths(self, app):
+        app.config.update(LIST_CACHE_ENABLED=False, COMPRESS_MIN_SIZE=0)
+        user_id = self._seed(app)
+        cookies = self._cookie(app, user_id)
+        gzip_header = {"Accept-Encoding": "gzip"}
+
+        flask_client = app.test_client()
+        with flask_client.session_transaction() as sess:
+            sess["_user_id"] = str(user_id)
+            sess["_fresh"] = True
+        want = flask_client.get("/api/orders", headers=gzip_header)
+
+        got, = self._fetch(app, [("/api/orders", cookies, gzip_header)])
+        assert got.headers["content-encoding"] == want.headers["Content-Encoding"] == "gzip"
+        assert got.headers["etag"] == want.headers["ETag"]
+        assert got.headers["etag"].startswith("W/")
+
+        # with the usual threshold the empty 304 isn't gzipped, its tag is still weak
+        app.config["COMPRESS_MIN_SIZE"] = 500
+        not_modified, = self._fetch(app, [("/api/orders", cookies, {**gzip_header, "If-None-Match": got.headers["etag"]})])
+        assert not_modified.status_code == 304
+        assert not_modified.headers["etag"] == got.headers["etag"]
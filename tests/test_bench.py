@@ -0,0 +1,25 @@
+import os, sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import bench
+
+class TestBench:
+
+    def test_percentiles(self):
+        values = [i / 1000 for i in range(1, 101)]
+        summary = bench.summarize(values, [2] * 100, elapsed=1.0)
+        assert summary['p50_ms'] == 50.0
+        assert summary['p99_ms'] == 99.0
+        assert summary['throughput_rps'] == 100.0
+        assert summary['sql_per_request'] == 2.0
+
+    def test_small_run_reports_every_endpoint(self):
+        args = bench.parse_args(['--users', '1', '--customers', '3', '--orders', '2',
+                                 '--requests', '3', '--warmup', '1'])
+        report = bench.run(args)
+        assert set(report['endpoints']) == set(bench.ENDPOINTS)
+        for result in report['endpoints'].values():
+            assert result['requests'] == 3
+            assert result['sql_per_request'] > 0
+            assert result['bytes_per_response'] > 0
+        rows = report['order_rows']
+        assert rows['orm_objects']['rows'] == rows['column_rows']['rows'] > 0
@@ -0,0 +1,25 @@
+import os, sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import pytest
+
+pytest.importorskip("starlette")
+pytest.importorskip("aiosqlite")
+pytest.importorskip("a2wsgi")
+pytest.importorskip("httpx")
+
+import bench_async
+
+class TestBenchAsync:
+
+    def test_small_run_compares_both_paths(self):
+        args = bench_async.parse_args(['--users', '1', '--customers', '3', '--orders', '2',
+                                       '--clients', '5', '--threads', '2', '--requests', '10', '--warmup', '2'])
+        report = bench_async.run(args)
+        assert set(report['endpoints']) == set(bench_async.ENDPOINTS)
+        for result in report['endpoints'].values():
+            for path in ('wsgi', 'asgi'):
+                assert result[path]['requests'] == 10
+                assert result[path]['errors'] == 0
+                assert result[path]['bytes_per_response'] > 0
+                assert result[path]['cpu_ms_per_request'] > 0
+                assert 'sql_per_request' not in result[path]
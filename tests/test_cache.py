@@ -0,0 +1,36 @@
+import os, sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app.cache import LRUBackend, ListCache, TTLCache
+
+class TestCache:
+
+    def test_lru_evicts_least_recently_used(self):
+        backend = LRUBackend(maxsize=2)
+        backend.set(1, "a", "A")
+        backend.set(1, "b", "B")
+        backend.get(1, "a")
+        backend.set(2, "c", "C")
+        assert backend.get(1, "b") is None
+        assert backend.get(1, "a") == "A"
+        assert len(backend) == 2
+
+    def test_invalidate_only_drops_that_user(self):
+        cache = ListCache(LRUBackend())
+        cache.get_or_set(1, "orders", lambda: "user 1")
+        cache.get_or_set(2, "orders", lambda: "user 2")
+        cache.invalidate(1)
+        assert cache.get_or_set(1, "orders", lambda: "fresh") == "fresh"
+        assert cache.get_or_set(2, "orders", lambda: "fresh") == "user 2"
+        assert (cache.hits, cache.misses) == (1, 3)
+
+    def test_ttl_cache_expires_entries(self, monkeypatch):
+        import app.cache
+        now = [100.0]
+        monkeypatch.setattr(app.cache.time, "monotonic", lambda: now[0])
+        cache = TTLCache(maxsize=10, ttl=5)
+        cache.set(1, "user")
+        now[0] += 4
+        assert cache.get(1) == "user"
+        now[0] += 2
+        assert cache.get(1) is None
+        assert len(cache) == 0
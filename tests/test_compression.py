@@ -0,0 +1,104 @@
+import os, sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import gzip
+import json
+import zlib
+import pytest
+from app import db
+from app.compression import gzip_stream
+from app.models import User, Customer, Order
+
+GZIP = {"Accept-Encoding": "gzip"}
+
+@pytest.mark.usefixtures("app")
+class TestCompression:
+
+    def _seed(self, app, client, orders=40):
+        u = User(google_id="gz", email="gz@example.com", name="Gz")
+        db.session.add(u)
+        db.session.flush()
+        c = Customer(name="Gzip Ltd", phone="0700000000", created_by=u.id)
+        db.session.add(c)
+        db.session.flush()
+        db.session.add_all([Order(order_name=f"Bulk {i}", price=i, customer_id=c.id, created_by=u.id)
+                            for i in range(orders)])
+        db.session.commit()
+        with client.session_transaction() as sess:
+            sess["_user_id"] = str(u.id)
+            sess["_fresh"] = True
+
+    def test_large_json_is_gzipped(self, app, client):
+        self._seed(app, client)
+        plain = client.get("/api/orders")
+        assert "Content-Encoding" not in plain.headers
+        assert "Accept-Encoding" in plain.headers["Vary"]
+
+        resp = client.get("/api/orders", headers=GZIP)
+        assert resp.headers["Content-Encoding"] == "gzip"
+        assert int(resp.headers["Content-Length"]) == len(resp.data) < len(plain.data)
+        assert json.loads(gzip.decompress(resp.data)) == plain.get_json()
+
+        # the representation differs, so the ETag becomes weak but still revalidates
+        assert resp.headers["ETag"] == "W/" + plain.headers["ETag"]
+        again = client.get("/api/orders", headers={**GZIP, "If-None-Match": resp.headers["ETag"]})
+        assert again.status_code == 304
+        # the 304 carries the same validator as the gzipped 200 it revalidates
+        assert again.headers["ETag"] == resp.headers["ETag"]
+        plain_again = client.get("/api/orders", headers={"If-None-Match": plain.headers["ETag"]})
+        assert plain_again.headers["ETag"] == plain.headers["ETag"]
+
+    def test_cached_list_is_gzipped_once(self, app, client, monkeypatch):
+        import app.compression as compression
+        self._seed(app, client)
+        calls = []
+        real_gzip = compression.gzip_data
+        monkeypatch.setattr(compression, "gzip_data", lambda data, level: calls.append(len(data)) or real_gzip(data, level))
+
+        first = client.get("/api/orders", headers=GZIP)
+        second = client.get("/api/orders", headers=GZIP)
+        assert len(calls) == 1
+        assert second.headers["Content-Encoding"] == "gzip"
+        assert second.data == first.data
+        assert second.headers["ETag"] == first.headers["ETag"]
+        assert second.headers["ETag"].startswith("W/")
+        assert "Accept-Encoding" in second.headers["Vary"]
+
+        # the same entry still serves identity clients
+        plain = client.get("/api/orders")
+        assert "Content-Encoding" not in plain.headers
+        assert json.loads(gzip.decompress(second.data)) == plain.get_json()
+        assert client.get("/api/cache/stats").get_json()["hits"] == 2
+
+    def test_threshold_level_and_switch(self, app, client):
+        self._seed(app, client, orders=1)
+        assert "Content-Encoding" not in client.get("/api/health", headers=GZIP).headers
+        assert "Content-Encoding" not in client.get("/api/orders", headers={"Accept-Encoding": "gzip;q=0"}).headers
+
+        app.config["COMPRESS_MIN_SIZE"] = 1
+        app.config["COMPRESS_LEVEL"] = 1
+        assert client.get("/api/health", headers=GZIP).headers["Content-Encoding"] == "gzip"
+
+        app.config["COMPRESS_ENABLED"] = False
+        assert "Content-Encoding" not in client.get("/api/health", headers=GZIP).headers
+
+    def test_streamed_export_stays_streamed(self, app, client, monkeypatch):
+        from app import routes
+        monkeypatch.setattr(routes, "EXPORT_CHUNK_SIZE", 5)
+        self._seed(app, client)
+        plain = client.get("/api/orders/export?format=ndjson").get_data()
+
+        resp = client.get("/api/orders/export?format=ndjson", headers=GZIP, buffered=False)
+        assert resp.is_streamed
+        assert resp.headers["Content-Encoding"] == "gzip"
+        assert "Content-Length" not in resp.headers
+        chunks = [chunk for chunk in resp.response if chunk]
+        resp.close()
+        assert len(chunks) > 2
+        assert gzip.decompress(b"".join(chunks)) == plain
+
+    def test_gzip_stream_flushes_every_chunk(self):
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        stream = gzip_stream(iter(["first line\n", b"second line\n"]), level=6)
+        # each chunk can be decoded on arrival, nothing waits for the end of the stream
+        assert decompressor.decompress(next(stream)) == b"first line\n"
+        assert decompressor.decompress(next(stream)) == b"second line\n"
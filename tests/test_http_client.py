@@ -0,0 +1,68 @@
+import os, sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import pytest
+import requests
+from app import http_client
+from app.http_client import HttpClient, CircuitBreaker, CircuitOpenError
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(HttpClient, "backoff_delay", lambda self, attempt: 0)
+
+class TestHttpClient:
+
+    def test_retries_idempotent_requests(self, stub_server):
+        stub_server.add("/flaky", status=503)
+        stub_server.add("/flaky", status=200, body={"ok": True})
+        client = HttpClient("test", retries=2)
+
+        response = client.get(stub_server.url("/flaky"))
+        assert response.json() == {"ok": True}
+        assert len(stub_server.requests) == 2
+
+    def test_post_is_not_retried(self, stub_server):
+        stub_server.add("/send", status=503)
+        stub_server.add("/send", status=200)
+        client = HttpClient("test", retries=2)
+
+        assert client.post(stub_server.url("/send")).status_code == 503
+        assert len(stub_server.requests) == 1
+
+    def test_read_timeout(self, stub_server):
+        stub_server.add("/slow", status=200, delay=0.5)
+        client = HttpClient("test", read_timeout=0.1, retries=0)
+        with pytest.raises(requests.exceptions.Timeout):
+            client.get(stub_server.url("/slow"))
+
+    def test_circuit_opens_and_fails_fast(self, stub_server):
+        stub_server.add("/down", status=503)
+        client = HttpClient("test", retries=0, failure_threshold=2, reset_timeout=60)
+
+        client.get(stub_server.url("/down"))
+        client.get(stub_server.url("/down"))
+        assert client.breaker.state == "open"
+
+        with pytest.raises(CircuitOpenError):
+            client.get(stub_server.url("/down"))
+        assert len(stub_server.requests) == 2   # the third call never left the process
+
+    def test_breaker_half_open_recovers(self):
+        now = [0.0]
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=lambda: now[0])
+        breaker.record_failure()
+        assert not breaker.allow()
+
+        now[0] = 11
+        assert breaker.allow()          # one trial request
+        assert not breaker.allow()      # others still fail fast
+        breaker.record_success()
+        assert breaker.state == "closed"
+
+    def test_backoff_is_bounded(self, monkeypatch):
+        monkeypatch.undo()
+        client = HttpClient("test", backoff=0.5, max_backoff=1.0)
+        assert all(0 <= client.backoff_delay(attempt) <= 1.0 for attempt in range(10))
+
+    def test_clients_are_shared_per_upstream(self):
+        assert http_client.get_client("google") is http_client.get_client("google")
+        assert http_client.get_client("google") is not http_client.get_client("africastalking")
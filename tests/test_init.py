@@ -19,12 +19,14 @@ class TestAppInit:
         assert app is not None
         assert 'SECRET_KEY' in app.config
 
-    def test_database_initialization(self):
+    def test_database_initialization(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'init.db'}")
         app = create_app()
         with app.app_context():
             # create and drop tables
             db.create_all()
             db.drop_all()
+            db.engine.dispose()
 
     def test_blueprints_registered(self):
         app = create_app()
@@ -46,4 +48,43 @@ class TestAppInit:
             
             from app import login_manager
             loaded_user = login_manager._user_callback(user.id)
-            assert loaded_user.id == user.id
\ No newline at end of file
+            assert loaded_user.id == user.id
+
+    def test_user_loader_uses_identity_cache(self, app):
+        with app.app_context():
+            from app.models import User
+            from app.cache import user_cache
+            from app import login_manager
+            user = User(google_id='cache123', email='cache@test.com', name='Cached')
+            db.session.add(user)
+            db.session.commit()
+
+            first = login_manager._user_callback(str(user.id))
+            assert user_cache.get(user.id) is first
+            assert login_manager._user_callback(str(user.id)) is first
+
+            # changing the user drops the snapshot
+            user.name = 'Renamed'
+            db.session.commit()
+            assert user_cache.get(user.id) is None
+            assert login_manager._user_callback(str(user.id)).name == 'Renamed'
+
+    def test_sqlite_pragmas_applied(self, tmp_path, monkeypatch):
+        from sqlalchemy import text
+        # its own file, switching to WAL is persistent and must not touch instance/orderapp.db
+        monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'pragmas.db'}")
+        app = create_app()
+        with app.app_context(), db.engine.connect() as conn:
+            assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+            assert conn.execute(text("PRAGMA busy_timeout")).scalar() == app.config["SQLITE_PRAGMAS"]["busy_timeout"]
+            assert conn.execute(text("PRAGMA synchronous")).scalar() == 1   # NORMAL
+        with app.app_context():
+            db.engine.dispose()
+
+    def test_server_database_engine_options(self):
+        from config import Config, engine_options
+        settings = {k: getattr(Config, k) for k in dir(Config) if k.isupper()}
+        options = engine_options("postgresql://db/orders", settings)
+        assert options["pool_pre_ping"] is True
+        assert options["pool_size"] == Config.DB_POOL_SIZE
+        assert "pool_size" not in engine_options("sqlite:///x.db", settings)
@@ -0,0 +1,28 @@
+import os, sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import pytest
+from datetime import datetime
+from decimal import Decimal
+from flask.json.provider import DefaultJSONProvider
+from app.json_provider import FastJSONProvider
+
+@pytest.mark.usefixtures("app")
+class TestFastJSONProvider:
+
+    def test_matches_default_provider(self, app):
+        fast, default = FastJSONProvider(app), DefaultJSONProvider(app)
+        data = [{'z': 1, 'a': [1.5, None, True], 'when': datetime(2025, 1, 2, 3, 4, 5),
+                 'amount': Decimal('9.99')}, 'plain']
+        assert fast.response(data).get_data() == default.response(data).get_data()
+
+        unicode = {'name': 'Kĩmani', 'price': 1999.0}
+        assert fast.response(unicode).get_json() == default.response(unicode).get_json()
+
+    def test_falls_back_for_unsupported_values(self, app):
+        fast = FastJSONProvider(app)
+        assert fast.response({'big': 2 ** 70}).get_data() == b'{"big":1180591620717411303424}\n'
+        app.debug = True
+        assert fast.response({'b': 1, 'a': 2}).get_data() == b'{\n  "a": 2,\n  "b": 1\n}\n'
+
+    def test_app_uses_fast_provider(self, app):
+        assert isinstance(app.json, FastJSONProvider)
@@ -0,0 +1,49 @@
+import os, sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import pytest
+from app import db, metrics
+from app.models import User
+from app.services import SMSService
+
+@pytest.mark.usefixtures("app")
+class TestMetrics:
+
+    def _login(self, client):
+        u = User(google_id="metrics", email="metrics@example.com", name="Metrics")
+        db.session.add(u)
+        db.session.commit()
+        with client.session_transaction() as sess:
+            sess["_user_id"] = str(u.id)
+            sess["_fresh"] = True
+
+    def test_requests_and_queries_are_recorded(self, app, client):
+        self._login(client)
+        endpoint = "main.api_get_orders"
+        before_requests = metrics.REQUESTS.value(endpoint=endpoint, method="GET", status="200")
+        before_queries = metrics.DB_QUERIES.value(endpoint=endpoint)
+
+        client.get("/api/orders")
+
+        assert metrics.REQUESTS.value(endpoint=endpoint, method="GET", status="200") == before_requests + 1
+        assert metrics.DB_QUERIES.value(endpoint=endpoint) > before_queries
+
+        body = client.get("/api/metrics").get_data(as_text=True)
+        assert "# TYPE http_request_duration_seconds histogram" in body
+        assert f'http_request_duration_seconds_bucket{{endpoint="{endpoint}",le="+Inf"}}' in body
+        assert 'db_queries_total{endpoint="main.api_get_orders"}' in body
+
+    def test_sms_results_are_recorded(self):
+        before = metrics.SMS_MESSAGES.value(result="sent")
+        SMSService().send_many([("0711000000", "Tea", 1), ("0722000000", "Tea", 1)])
+        assert metrics.SMS_MESSAGES.value(result="sent") == before + 2
+        assert metrics.SMS_LATENCY.count() >= 1
+
+    def test_slow_request_log(self, app, client, capsys):
+        app.config["SLOW_REQUEST_MS"] = 0
+        client.get("/api/health")
+        assert "Slow request: GET /api/health 200" in capsys.readouterr().out
+
+    def test_label_values_are_escaped(self):
+        counter = metrics.Counter("x_total", "test", ["path"])
+        counter.inc(path='a"b')
+        assert 'x_total{path="a\\"b"} 1' in counter.render()
@@ -0,0 +1,59 @@
+import os, sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import pytest
+from sqlalchemy import inspect, text
+from app import db
+from app.migrations import upgrade, current_version, MIGRATIONS
+
+@pytest.mark.usefixtures("app")
+class TestMigrations:
+
+    def test_upgrade_adds_indexes_to_existing_tables(self, app):
+        # simulate a database created before the indexes existed
+        with db.engine.begin() as conn:
+            for name in ['ix_customer_created_by_created_at', 'ix_order_created_by_created_at', 'ix_order_customer_id']:
+                conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+            conn.execute(text("DELETE FROM schema_version"))
+
+        assert upgrade() == [number for number, _, _ in MIGRATIONS]
+
+        inspector = inspect(db.engine)
+        order_indexes = {i['name'] for i in inspector.get_indexes('order')}
+        customer_indexes = {i['name'] for i in inspector.get_indexes('customer')}
+        assert {'ix_order_created_by_created_at', 'ix_order_customer_id'} <= order_indexes
+        assert 'ix_customer_created_by_created_at' in customer_indexes
+
+    def test_upgrade_is_idempotent(self, app):
+        upgrade()
+        assert upgrade() == []
+        with db.engine.connect() as conn:
+            assert current_version(conn) == MIGRATIONS[-1][0]
+
+    def test_upgrade_adds_data_version_column(self, app):
+        # SQLite 3.35+ can drop columns, which lets us rebuild the pre-migration shape
+        with db.engine.begin() as conn:
+            conn.execute(text('ALTER TABLE "user" DROP COLUMN data_version'))
+            conn.execute(text("DELETE FROM schema_version WHERE version >= 2"))
+
+        assert 2 in upgrade()
+        columns = {c['name'] for c in inspect(db.engine).get_columns('user')}
+        assert 'data_version' in columns
+
+def test_db_upgrade_command_on_pre_migration_database(tmp_path, monkeypatch):
+    # the committed database predates every migration: just user, customer and order
+    import shutil
+    from app import create_app
+    path = tmp_path / "baseline.db"
+    shutil.copy(os.path.join(os.path.dirname(__file__), "..", "instance", "orderapp.db"), path)
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{path}")
+    monkeypatch.setenv("AUTO_CREATE_SCHEMA", "0")
+    app = create_app()
+
+    result = app.test_cli_runner().invoke(args=["db-upgrade"])
+    assert result.exit_code == 0, result.output
+    with app.app_context():
+        tables = set(inspect(db.engine).get_table_names())
+        assert {"sms_outbox", "order_rollup", "schema_version"} <= tables
+        with db.engine.connect() as conn:
+            assert current_version(conn) == MIGRATIONS[-1][0]
+        db.engine.dispose()
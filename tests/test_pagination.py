@@ -0,0 +1,21 @@
+import os, sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import pytest
+from datetime import datetime
+from app.pagination import encode_cursor, decode_cursor, parse_limit, InvalidCursor, MAX_LIMIT
+
+class TestPagination:
+
+    def test_cursor_round_trip(self):
+        ts = datetime(2025, 3, 4, 5, 6, 7, 890)
+        assert decode_cursor(encode_cursor(ts, 42)) == (ts, 42)
+
+    def test_bad_cursor_rejected(self):
+        with pytest.raises(InvalidCursor):
+            decode_cursor("garbage!")
+
+    def test_limit_is_clamped(self):
+        assert parse_limit("0") == 1
+        assert parse_limit(str(MAX_LIMIT + 1)) == MAX_LIMIT
+        with pytest.raises(InvalidCursor):
+            parse_limit("ten")
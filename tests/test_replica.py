@@ -0,0 +1,159 @@
+import os, sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import sqlite3
+import pytest
+from app import create_app, db, metrics, replica
+from app.models import User, Customer, bump_data_version
+
+def make_app(monkeypatch, primary, replica_path):
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{primary}")
+    monkeypatch.setenv("REPLICA_DATABASE_URL", f"sqlite:///file:{replica_path}?mode=ro&uri=true")
+    app = create_app()
+    app.config.update(TESTING=True)
+    return app
+
+def copy_to_replica(primary, replica_path):
+    with sqlite3.connect(primary) as src, sqlite3.connect(replica_path) as dst:
+        src.backup(dst)
+
+def close_app(app):
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+    app.extensions["replica_engine"].dispose()
+
+def add_customer(name, user_id):
+    db.session.add(Customer(name=name, phone="0700000000", created_by=user_id))
+    db.session.commit()
+
+def names(client):
+    return sorted(c["name"] for c in client.get("/api/customers").get_json())
+
+@pytest.fixture(autouse=True)
+def reset_replica():
+    replica.reset_replica_state()
+    yield
+    replica.reset_replica_state()
+
+class TestReplica:
+
+    def test_reads_follow_replica_until_own_write(self, tmp_path, monkeypatch):
+        primary, replica_path = tmp_path / "primary.db", tmp_path / "replica.db"
+        app = make_app(monkeypatch, primary, replica_path)
+        client = app.test_client()
+        with app.app_context():
+            db.create_all()
+            user = User(google_id="rep", email="rep@example.com", name="Rep")
+            db.session.add(user)
+            db.session.commit()
+            user_id = user.id
+            add_customer("Replicated", user_id)
+
+            # snapshot the primary as the replica, then let the replica fall behind
+            copy_to_replica(primary, replica_path)
+            add_customer("Not replicated yet", user_id)
+
+        with client.session_transaction() as sess:
+            sess["_user_id"] = str(user_id)
+            sess["_fresh"] = True
+
+        assert names(client) == ["Replicated"]
+        assert "No customers yet." not in client.get("/dashboard").get_data(as_text=True)
+
+        client.post("/customer", data={"name": "Mine", "phone": "0711000000"})
+        assert names(client) == ["Mine", "Not replicated yet", "Replicated"]
+
+        # once the sticky window has passed, reads go back to the replica
+        later = replica.time.time() + app.config["REPLICA_STICKY_SECONDS"] + 1
+        monkeypatch.setattr(replica.time, "time", lambda: later)
+        assert names(client) == ["Replicated"]
+
+        close_app(app)
+
+    def test_etag_and_cache_follow_the_replica(self, tmp_path, monkeypatch):
+        primary, replica_path = tmp_path / "primary.db", tmp_path / "replica.db"
+        app = make_app(monkeypatch, primary, replica_path)
+        client = app.test_client()
+        with app.app_context():
+            db.create_all()
+            user = User(google_id="rep3", email="rep3@example.com", name="Rep")
+            db.session.add(user)
+            db.session.commit()
+            user_id = user.id
+            add_customer("Old", user_id)
+            bump_data_version(user_id)
+            db.session.commit()
+            copy_to_replica(primary, replica_path)
+
+            # written from another device, not replicated yet
+            add_customer("New", user_id)
+            bump_data_version(user_id)
+            db.session.commit()
+
+        with client.session_transaction() as sess:
+            sess["_user_id"] = str(user_id)
+            sess["_fresh"] = True
+
+        lagging = client.get("/api/customers")
+        assert [c["name"] for c in lagging.get_json()] == ["Old"]
+        assert client.get("/api/customers", headers={"If-None-Match": lagging.headers["ETag"]}).status_code == 304
+
+        copy_to_replica(primary, replica_path)
+        resp = client.get("/api/customers", headers={"If-None-Match": lagging.headers["ETag"]})
+        assert resp.status_code == 200
+        assert sorted(c["name"] for c in resp.get_json()) == ["New", "Old"]
+
+        close_app(app)
+
+    def test_replica_queries_are_counted(self, tmp_path, monkeypatch):
+        primary, replica_path = tmp_path / "primary.db", tmp_path / "replica.db"
+        app = make_app(monkeypatch, primary, replica_path)
+        client = app.test_client()
+        with app.app_context():
+            db.create_all()
+            user = User(google_id="rep4", email="rep4@example.com", name="Rep")
+            db.session.add(user)
+            db.session.commit()
+            user_id = user.id
+            copy_to_replica(primary, replica_path)
+
+        with client.session_transaction() as sess:
+            sess["_user_id"] = str(user_id)
+            sess["_fresh"] = True
+
+        endpoint = "main.api_get_customers"
+        client.get("/api/customers")    # loads the user into the identity cache
+        before = metrics.DB_QUERIES.value(endpoint=endpoint)
+        client.get("/api/customers?limit=5")
+        # version and list query, both on the replica
+        assert metrics.DB_QUERIES.value(endpoint=endpoint) >= before + 2
+
+        close_app(app)
+
+    def test_unavailable_replica_falls_back_to_primary(self, tmp_path, monkeypatch, capsys):
+        app = make_app(monkeypatch, tmp_path / "primary.db", tmp_path / "missing.db")
+        client = app.test_client()
+        with app.app_context():
+            db.create_all()
+            user = User(google_id="rep2", email="rep2@example.com", name="Rep")
+            db.session.add(user)
+            db.session.commit()
+            user_id = user.id
+            add_customer("Primary only", user_id)
+
+        with client.session_transaction() as sess:
+            sess["_user_id"] = str(user_id)
+            sess["_fresh"] = True
+
+        assert names(client) == ["Primary only"]
+        assert names(client) == ["Primary only"]
+        # one failed connect, then the replica is skipped until the retry delay
+        assert capsys.readouterr().out.count("Replica unavailable") == 1
+        assert not (tmp_path / "missing.db").exists()
+
+        close_app(app)
+
+    def test_no_replica_configured(self, app):
+        assert not replica.has_replica()
+        with app.test_request_context():
+            assert replica.read_session() is db.session
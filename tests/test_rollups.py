@@ -0,0 +1,63 @@
+import os, sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import pytest
+from datetime import datetime, date
+from app import db, rollups
+from app.models import User, Customer, Order, OrderRollup
+
+@pytest.mark.usefixtures("app")
+class TestRollups:
+
+    def _setup(self):
+        u = User(google_id="roll", email="roll@example.com", name="Roll")
+        db.session.add(u)
+        db.session.flush()
+        a = Customer(name="A", phone="0711000000", created_by=u.id)
+        b = Customer(name="B", phone="0722000000", created_by=u.id)
+        db.session.add_all([a, b])
+        db.session.flush()
+        return u, a, b
+
+    def _snapshot(self):
+        return sorted((r.user_id, r.customer_id, r.day, r.order_count, round(r.revenue, 2))
+                      for r in OrderRollup.query.filter(OrderRollup.order_count > 0))
+
+    def test_incremental_matches_rebuild(self, app):
+        u, a, b = self._setup()
+        orders = [
+            (a.id, datetime(2025, 1, 1, 9), 10.0),
+            (a.id, datetime(2025, 1, 1, 18), 5.5),
+            (b.id, datetime(2025, 1, 2, 12), 7.0),
+        ]
+        for customer_id, created_at, price in orders:
+            db.session.add(Order(order_name="x", price=price, customer_id=customer_id,
+                                 created_by=u.id, created_at=created_at))
+        rollups.record_orders(u.id, orders)
+        rollups.record_orders(u.id, orders[1:2], sign=-1)
+        db.session.query(Order).filter_by(price=5.5).delete()
+        db.session.commit()
+
+        incremental = self._snapshot()
+        assert incremental == [(u.id, a.id, date(2025, 1, 1), 1, 10.0), (u.id, b.id, date(2025, 1, 2), 1, 7.0)]
+
+        rollups.rebuild()
+        db.session.commit()
+        assert self._snapshot() == incremental
+
+    def test_stats_grouping_and_range(self, app):
+        u, a, b = self._setup()
+        rollups.record_orders(u.id, [
+            (a.id, datetime(2025, 1, 1), 10.0),
+            (b.id, datetime(2025, 1, 1), 4.0),
+            (b.id, datetime(2025, 1, 3), 6.0),
+        ])
+        db.session.commit()
+
+        by_day = rollups.stats(u.id, group_by='day')
+        assert by_day == [
+            {'day': '2025-01-01', 'order_count': 2, 'revenue': 14.0},
+            {'day': '2025-01-03', 'order_count': 1, 'revenue': 6.0},
+        ]
+        by_customer = rollups.stats(u.id, date(2025, 1, 1), date(2025, 1, 2), group_by='customer')
+        assert [(r['customer_name'], r['revenue']) for r in by_customer] == [('A', 10.0), ('B', 4.0)]
+        assert rollups.stats(u.id, group_by='total') == [{'order_count': 3, 'revenue': 20.0}]
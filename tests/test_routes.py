@@ -1,8 +1,9 @@
 import os, sys
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 import pytest
+from datetime import datetime
 from app import db
-from app.models import User, Customer, Order
+from app.models import User, Customer, Order, SmsOutbox
 
 @pytest.mark.usefixtures("app")
 class TestRoutes:
@@ -104,3 +105,349 @@ class TestRoutes:
             assert o is not None
             assert o.price == 5.5
             assert o.customer_id == c.id
+
+    def test_create_order_queues_sms(self, app, client, monkeypatch):
+        u = self._login_user(app, client)
+        with app.app_context():
+            c = Customer(name="Queue Customer", phone="0700000999", created_by=u.id)
+            db.session.add(c)
+            db.session.commit()
+            customer_id = c.id
+
+        from app import services
+        def fail_send(*args):
+            raise AssertionError("SMS must not be sent inline")
+        monkeypatch.setattr(services.sms_service, "send_order_confirmation", fail_send)
+
+        resp = client.post(
+            "/order",
+            data={"order_name": "Queued Order", "price": "12", "customer_id": customer_id},
+            follow_redirects=True,
+        )
+        assert resp.status_code == 200
+        assert b"SMS confirmation queued" in resp.data
+
+        with app.app_context():
+            o = Order.query.filter_by(order_name="Queued Order").first()
+            msg = SmsOutbox.query.filter_by(order_id=o.id).first()
+            assert msg is not None
+            assert msg.status == "pending"
+            assert msg.phone == "0700000999"
+
+    def test_api_orders_keyset_pagination(self, app, client):
+        u = self._login_user(app, client)
+        with app.app_context():
+            c = Customer(name="Paged Ltd", phone="+254700000000", created_by=u.id)
+            db.session.add(c)
+            db.session.commit()
+            same_time = datetime(2025, 1, 1, 12, 0, 0)
+            for i in range(5):
+                db.session.add(Order(order_name=f"Order {i}", price=10 + i, customer_id=c.id,
+                                     created_by=u.id, created_at=same_time))
+            db.session.commit()
+
+        seen = []
+        cursor = None
+        while True:
+            url = "/api/orders?limit=2" + (f"&cursor={cursor}" if cursor else "")
+            data = client.get(url).get_json()
+            seen.extend(o["id"] for o in data["items"])
+            cursor = data["next_cursor"]
+            if not cursor:
+                break
+
+        assert len(seen) == 5
+        assert seen == sorted(seen, reverse=True)
+
+        resp = client.get("/api/customers?limit=10")
+        data = resp.get_json()
+        assert data["next_cursor"] is None
+        assert data["items"][0]["order_count"] == 5
+
+    def test_api_orders_rows_match_to_dict(self, app, client):
+        u = self._login_user(app, client)
+        with app.app_context():
+            c = Customer(name="Kĩmani & Sons", phone="+254700000000", created_by=u.id)
+            db.session.add(c)
+            db.session.commit()
+            db.session.add_all([Order(order_name=f"Unga {i}", price=99.5 + i, customer_id=c.id,
+                                      created_by=u.id) for i in range(3)])
+            db.session.commit()
+            expected = [o.to_dict() for o in Order.query.order_by(Order.id)]
+
+        data = client.get("/api/orders").get_json()
+        assert sorted(data, key=lambda o: o["id"]) == expected
+        items = client.get("/api/orders?limit=10").get_json()["items"]
+        assert items == expected[::-1]
+
+    def test_api_orders_invalid_cursor(self, app, client):
+        self._login_user(app, client)
+        resp = client.get("/api/orders?cursor=not-a-cursor")
+        assert resp.status_code == 400
+
+    def _count_queries(self, app, client, url):
+        from sqlalchemy import event
+        statements = []
+        def before_execute(conn, cursor, statement, *args):
+            statements.append(statement)
+        with app.app_context():
+            engine = db.engine
+        event.listen(engine, "before_cursor_execute", before_execute)
+        try:
+            resp = client.get(url)
+        finally:
+            event.remove(engine, "before_cursor_execute", before_execute)
+        assert resp.status_code == 200
+        return len(statements)
+
+    def test_api_lists_use_constant_queries(self, app, client):
+        app.config["LIST_CACHE_ENABLED"] = False   # rows are added behind the routes' back
+        u = self._login_user(app, client)
+
+        def add_customers(count):
+            with app.app_context():
+                for i in range(count):
+                    c = Customer(name=f"Customer {i}", phone="+254700000000", created_by=u.id)
+                    db.session.add(c)
+                    db.session.flush()
+                    db.session.add(Order(order_name="Item", price=1, customer_id=c.id, created_by=u.id))
+                db.session.commit()
+
+        add_customers(2)
+        client.get("/api/orders")   # warm the session so the user lookup is not counted once
+        small = (self._count_queries(app, client, "/api/orders"),
+                 self._count_queries(app, client, "/api/customers"))
+        add_customers(10)
+        large = (self._count_queries(app, client, "/api/orders"),
+                 self._count_queries(app, client, "/api/customers"))
+        assert small == large
+
+    def test_dashboard_pages_and_totals(self, app, client):
+        from app.routes import DASHBOARD_PAGE_SIZE
+        u = self._login_user(app, client)
+        with app.app_context():
+            c = Customer(name="Dash Ltd", phone="+254700000000", created_by=u.id)
+            db.session.add(c)
+            db.session.flush()
+            for i in range(DASHBOARD_PAGE_SIZE + 5):
+                db.session.add(Order(order_name=f"Dash order {i}", price=2, customer_id=c.id, created_by=u.id))
+            db.session.commit()
+
+        resp = client.get("/dashboard")
+        assert resp.status_code == 200
+        html = resp.get_data(as_text=True)
+        assert f"Orders ({DASHBOARD_PAGE_SIZE + 5})" in html
+        assert f"${(DASHBOARD_PAGE_SIZE + 5) * 2:.2f}" in html
+        assert html.count("Dash order") == DASHBOARD_PAGE_SIZE
+        assert "orders_cursor=" in html
+
+        # a bad cursor falls back to the first page
+        assert client.get("/dashboard?orders_cursor=bogus").status_code == 200
+
+    def test_customer_search(self, app, client):
+        self._login_user(app, client)
+        # through the route, so the search index is kept in sync
+        client.post("/customer", data={"name": "Alpha Foods", "phone": "0711000000"})
+        client.post("/customer", data={"name": "Beta 100%", "phone": "0722000000"})
+
+        names = [c["name"] for c in client.get("/api/customers/search?q=alp").get_json()]
+        assert names == ["Alpha Foods"]
+        # word prefixes, the same matches as /api/search
+        names = [c["name"] for c in client.get("/api/customers/search?q=foo").get_json()]
+        assert names == [c["name"] for c in client.get("/api/search?q=foo").get_json()["customers"]] == ["Alpha Foods"]
+        names = [c["name"] for c in client.get("/api/customers/search?q=0722").get_json()]
+        assert names == ["Beta 100%"]
+        assert client.get("/api/customers/search?q=%25").get_json() == []
+        assert client.get("/api/customers/search").get_json() == []
+
+    def test_export_orders_streams_csv_and_ndjson(self, app, client, monkeypatch):
+        import csv, io, json
+        from app import routes
+        monkeypatch.setattr(routes, "EXPORT_CHUNK_SIZE", 2)
+        u = self._login_user(app, client)
+        with app.app_context():
+            c = Customer(name="Export Ltd", phone="+254700000000", created_by=u.id)
+            db.session.add(c)
+            db.session.flush()
+            for i in range(5):
+                db.session.add(Order(order_name=f"Export {i}", price=i + 1, customer_id=c.id, created_by=u.id))
+            db.session.commit()
+            expected = [o.to_dict() for o in Order.query.order_by(Order.id)]
+
+        resp = client.get("/api/orders/export?format=csv")
+        assert resp.status_code == 200
+        assert resp.is_streamed
+        assert resp.mimetype == "text/csv"
+        rows = list(csv.DictReader(io.StringIO(resp.get_data(as_text=True))))
+        assert [r["order_name"] for r in rows] == [o["order_name"] for o in expected]
+        assert rows[0]["customer_name"] == "Export Ltd"
+
+        resp = client.get("/api/orders/export?format=ndjson")
+        lines = resp.get_data(as_text=True).splitlines()
+        assert [json.loads(line) for line in lines] == expected
+
+        assert client.get("/api/orders/export?format=xml").status_code == 400
+
+    def test_import_json_with_errors_and_sms(self, app, client):
+        u = self._login_user(app, client)
+        with app.app_context():
+            existing = Customer(name="Existing", phone="0711000000", created_by=u.id)
+            other_user = User(google_id="other", email="other@example.com", name="Other")
+            db.session.add_all([existing, other_user])
+            db.session.flush()
+            foreign = Customer(name="Foreign", phone="0799000000", created_by=other_user.id)
+            db.session.add(foreign)
+            db.session.commit()
+            existing_id, foreign_id = existing.id, foreign.id
+
+        payload = {
+            "customers": [
+                {"ref": "new", "name": "New Shop", "phone": "0722000000"},
+                {"name": "", "phone": "0733000000"},
+            ],
+            "orders": [
+                {"order_name": "Bread", "price": 3, "customer_ref": "new"},
+                {"order_name": "Milk", "price": "2.5", "customer_id": existing_id},
+                {"order_name": "Eggs", "price": 0, "customer_id": existing_id},
+                {"order_name": "Stolen", "price": 1, "customer_id": foreign_id},
+                {"order_name": "Ghost", "price": 1, "customer_ref": "missing"},
+            ],
+        }
+        resp = client.post("/api/import?send_sms=1", json=payload)
+        assert resp.status_code == 200
+        report = resp.get_json()
+        assert report["customers_created"] == 1
+        assert report["orders_created"] == 2
+        assert report["sms_queued"] == 2
+        assert {e["row"] for e in report["errors"]} == {"customers[1]", "orders[2]", "orders[3]", "orders[4]"}
+
+        with app.app_context():
+            bread = Order.query.filter_by(order_name="Bread").one()
+            assert bread.customer.name == "New Shop"
+            assert SmsOutbox.query.filter_by(order_id=bread.id).one().phone == "0722000000"
+
+    def test_import_csv_upload(self, app, client):
+        import io
+        self._login_user(app, client)
+        csv_text = (
+            "type,ref,name,phone,order_name,price,customer_ref,customer_id\n"
+            "customer,a,CSV Shop,0744000000,,,,\n"
+            "order,,,,Sugar,4,a,\n"
+            "order,,,,Salt,abc,a,\n"
+            "widget,,,,,,,\n"
+        )
+        resp = client.post("/api/import", data={"file": (io.BytesIO(csv_text.encode()), "shop.csv")},
+                           content_type="multipart/form-data")
+        report = resp.get_json()
+        assert report["customers_created"] == 1
+        assert report["orders_created"] == 1
+        assert report["sms_queued"] == 0
+        assert [e["row"] for e in report["errors"]] == ["line 4", "line 5"]
+
+        assert client.post("/api/import?format=json", data="not json").status_code == 400
+
+    def test_import_json_rejects_non_list_sections(self, app, client):
+        self._login_user(app, client)
+        for payload in ({"customers": 5}, {"orders": "abc"}, {"customers": [], "orders": {"a": 1}}):
+            resp = client.post("/api/import", json=payload)
+            assert resp.status_code == 400
+            assert "must be a list" in resp.get_json()["error"]
+
+        report = client.post("/api/import", json={"customers": [5], "orders": ["x"]}).get_json()
+        assert [e["row"] for e in report["errors"]] == ["customers[0]", "orders[0]"]
+
+    def test_list_cache_hits_and_invalidation(self, app, client):
+        self._login_user(app, client)
+        client.post("/customer", data={"name": "Cached", "phone": "0711000000"})
+
+        first = client.get("/api/customers").get_json()
+        assert len(first) == 1
+        assert client.get("/api/customers").get_json() == first
+        stats = client.get("/api/cache/stats").get_json()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+
+        # a write through the routes drops the user's cached lists
+        client.post("/customer", data={"name": "Second", "phone": "0722000000"})
+        assert len(client.get("/api/customers").get_json()) == 2
+        assert client.get("/api/cache/stats").get_json()["misses"] == 2
+
+    def test_list_cache_follows_writes_from_other_workers(self, app, client):
+        from app.models import bump_data_version
+        u = self._login_user(app, client)
+        assert client.get("/api/customers").get_json() == []
+        assert "No customers yet." in client.get("/dashboard").get_data(as_text=True)
+
+        # committed elsewhere, this process's cache is never invalidated
+        db.session.add(Customer(name="Elsewhere", phone="0733000000", created_by=u.id))
+        bump_data_version(u.id)
+        db.session.commit()
+
+        assert [c["name"] for c in client.get("/api/customers").get_json()] == ["Elsewhere"]
+        assert "Elsewhere" in client.get("/dashboard").get_data(as_text=True)
+
+    def test_etag_conditional_get(self, app, client):
+        self._login_user(app, client)
+        client.post("/customer", data={"name": "Tagged", "phone": "0711000000"})
+
+        resp = client.get("/api/customers")
+        etag = resp.headers["ETag"]
+        assert etag and not etag.startswith("W/")
+
+        resp = client.get("/api/customers", headers={"If-None-Match": etag})
+        assert resp.status_code == 304
+        assert resp.data == b""
+
+        # paged requests get their own tag
+        assert client.get("/api/customers?limit=1").headers["ETag"] != etag
+
+        client.post("/customer", data={"name": "Changed", "phone": "0722000000"})
+        resp = client.get("/api/customers", headers={"If-None-Match": etag})
+        assert resp.status_code == 200
+        assert resp.headers["ETag"] != etag
+        assert len(resp.get_json()) == 2
+
+    def test_etag_matches_body_after_write_elsewhere(self, app, client):
+        from app.models import bump_data_version
+        u = self._login_user(app, client)
+        old_etag = client.get("/api/customers").headers["ETag"]
+
+        # committed by another worker, this process's cache still holds []
+        db.session.add(Customer(name="Elsewhere", phone="0733000000", created_by=u.id))
+        bump_data_version(u.id)
+        db.session.commit()
+
+        resp = client.get("/api/customers", headers={"If-None-Match": old_etag})
+        assert resp.status_code == 200
+        assert [c["name"] for c in resp.get_json()] == ["Elsewhere"]
+        new_etag = resp.headers["ETag"]
+        assert new_etag != old_etag
+        assert client.get("/api/customers", headers={"If-None-Match": new_etag}).status_code == 304
+
+    def test_logout_drops_cached_user(self, app, client):
+        from app.cache import user_cache
+        u = self._login_user(app, client)
+        client.get("/api/customers")
+        assert user_cache.get(u.id) is not None
+        client.get("/logout")
+        assert user_cache.get(u.id) is None
+
+    def test_stats_endpoint_tracks_order_routes(self, app, client):
+        u = self._login_user(app, client)
+        client.post("/customer", data={"name": "Stats Shop", "phone": "0711000000"})
+        with app.app_context():
+            customer_id = Customer.query.filter_by(name="Stats Shop").one().id
+        for price in ("10", "2.5"):
+            client.post("/order", data={"order_name": "Item", "price": price, "customer_id": customer_id})
+
+        rows = client.get("/api/stats?group_by=total").get_json()["rows"]
+        assert rows == [{"order_count": 2, "revenue": 12.5}]
+
+        with app.app_context():
+            order_id = Order.query.filter_by(price=2.5).one().id
+        client.post(f"/order/{order_id}/delete")
+        rows = client.get("/api/stats?group_by=customer").get_json()["rows"]
+        assert rows == [{"customer_id": customer_id, "customer_name": "Stats Shop", "order_count": 1, "revenue": 10.0}]
+
+        assert client.get("/api/stats?from=yesterday").status_code == 400
+        assert client.get("/api/stats?group_by=week").status_code == 400
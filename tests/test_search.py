@@ -0,0 +1,116 @@
+import os, sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import pytest
+from app import db, search
+from app.models import User, Customer, Order
+
+@pytest.mark.usefixtures("app")
+class TestSearch:
+
+    def _user(self, google_id):
+        u = User(google_id=google_id, email=f"{google_id}@example.com", name=google_id)
+        db.session.add(u)
+        db.session.flush()
+        return u
+
+    def _customer(self, user, name, phone):
+        c = Customer(name=name, phone=phone, created_by=user.id)
+        db.session.add(c)
+        db.session.flush()
+        search.index_customers([(c.id, user.id, name, phone)])
+        return c
+
+    def _order(self, user, customer, order_name):
+        o = Order(order_name=order_name, price=1.0, customer_id=customer.id, created_by=user.id)
+        db.session.add(o)
+        db.session.flush()
+        search.index_orders([(o.id, user.id, order_name)])
+        return o
+
+    def test_prefix_match_scoped_to_user(self, app):
+        alice, bob = self._user("s-alice"), self._user("s-bob")
+        wanjiku = self._customer(alice, "Wanjiku Kamau", "0711222333")
+        self._customer(alice, "Otieno", "0799000000")
+        self._customer(bob, "Wanjiru", "0711999999")
+        order = self._order(alice, wanjiku, "Maize flour")
+        db.session.commit()
+
+        customers, orders = search.search(alice.id, "wan")
+        assert [c.id for c in customers] == [wanjiku.id]
+        assert orders == []
+
+        customers, _ = search.search(alice.id, "0711")
+        assert [c.id for c in customers] == [wanjiku.id]
+
+        _, orders = search.search(alice.id, "maize fl")
+        assert [o.id for o in orders] == [order.id]
+
+        assert search.search(bob.id, "maize") == ([], [])
+
+        # the picker lookup reads the same index: word prefixes, customers only
+        assert [c.id for c in search.search_customers(alice.id, "kam")] == [wanjiku.id]
+        assert search.search_customers(alice.id, "maize") == []
+        assert search.search(alice.id, '"*) OR (') == ([], [])
+
+    def test_delete_and_rebuild_stay_in_sync(self, app):
+        u = self._user("s-sync")
+        c = self._customer(u, "Achieng", "0700111222")
+        order = self._order(u, c, "Sugar")
+        db.session.commit()
+
+        search.remove_order(order.id)
+        db.session.delete(order)
+        db.session.commit()
+        assert search.search(u.id, "sugar") == ([], [])
+
+        # rows inserted without indexing show up after a rebuild
+        db.session.add(Order(order_name="Sugarcane", price=2.0, customer_id=c.id, created_by=u.id))
+        db.session.commit()
+        assert search.search(u.id, "sugar")[1] == []
+        search.rebuild()
+        db.session.commit()
+        assert [o.order_name for o in search.search(u.id, "sugar")[1]] == ["Sugarcane"]
+
+    def test_search_route(self, app):
+        client = app.test_client()
+        u = self._user("s-route")
+        db.session.commit()
+        with client.session_transaction() as sess:
+            sess["_user_id"] = str(u.id)
+            sess["_fresh"] = True
+
+        client.post("/customer", data={"name": "Njeri", "phone": "0722333444"})
+        customer_id = Customer.query.filter_by(created_by=u.id).one().id
+        client.post("/order", data={"order_name": "Tea leaves", "price": "3.5", "customer_id": customer_id})
+
+        data = client.get("/api/search?q=nje").get_json()
+        assert [c["name"] for c in data["customers"]] == ["Njeri"]
+        data = client.get("/api/search?q=tea").get_json()
+        assert [o["order_name"] for o in data["orders"]] == ["Tea leaves"]
+        assert client.get("/api/search?q=tea&limit=x").status_code == 400
+
+    def test_prefix_fallback_without_fts(self, app, monkeypatch):
+        monkeypatch.setattr(search, "use_fts", lambda: False)
+        alice, bob = self._user("p-alice"), self._user("p-bob")
+        wanjiku = self._customer(alice, "Wanjiku", "0711222333")
+        self._customer(alice, "50% Off", "0799000000")
+        self._customer(bob, "Wanjiru", "0711999999")
+        order = self._order(alice, wanjiku, "Maize flour")
+        db.session.commit()
+
+        customers, orders = search.search(alice.id, "WAN")
+        assert [c.id for c in customers] == [wanjiku.id]
+        assert search.search(alice.id, "maize")[1] == [order]
+        assert [c.id for c in search.search_customers(alice.id, "0711")] == [wanjiku.id]
+        assert [c.id for c in search.search_customers(alice.id, "wan")] == [wanjiku.id]
+        # LIKE wildcards in the input are literal
+        assert [c.name for c in search.search_customers(alice.id, "50%")] == ["50% Off"]
+        assert search.search_customers(alice.id, "_") == []
+
+    def test_pattern_indexes_only_on_postgresql(self):
+        from sqlalchemy.dialects import postgresql
+        from sqlalchemy.schema import CreateIndex
+        indexes = {i.name: i for i in Customer.__table__.indexes}
+        ddl = str(CreateIndex(indexes["ix_customer_created_by_lower_name"]).compile(dialect=postgresql.dialect()))
+        assert "lower(name) text_pattern_ops" in ddl
+        assert "ix_customer_created_by_lower_name" not in {i["name"] for i in db.inspect(db.engine).get_indexes("customer")}
@@ -1,7 +1,5 @@
-import pytest
 import os
 from unittest.mock import patch, MagicMock
-import requests
 
 import sys
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -20,10 +18,12 @@ class TestSMSService:
         assert service.send_order_confirmation('+254712345678', 'Test', 99.99) is True
 
     @patch.dict(os.environ, {'AFRICASTALKING_USERNAME': 'user', 'AFRICASTALKING_API_KEY': 'key'})
-    @patch('app.services.requests.post')
+    @patch('app.http_client.requests.Session.request')
     def test_live_mode_works(self, mock_post):
         mock_response = MagicMock()
         mock_response.status_code = 201
+        mock_response.json.return_value = {'SMSMessageData': {'Recipients': [
+            {'number': '+254712345678', 'statusCode': 101, 'status': 'Success'}]}}
         mock_post.return_value = mock_response
 
         service = SMSService()
@@ -35,4 +35,45 @@ class TestSMSService:
     def test_phone_formatting(self):
         service = SMSService()
         assert service.format_phone_number('0712345678') == '+254712345678'
-        assert service.format_phone_number('+254712345678') == '+254712345678'
\ No newline at end of file
+        assert service.format_phone_number('+254712345678') == '+254712345678'
+
+    @patch.dict(os.environ, {'AFRICASTALKING_USERNAME': 'user', 'AFRICASTALKING_API_KEY': 'key'})
+    @patch('app.http_client.requests.Session.request')
+    def test_send_many_groups_by_message(self, mock_post):
+        mock_response = MagicMock()
+        mock_response.status_code = 201
+        mock_response.json.return_value = {'SMSMessageData': {'Recipients': [
+            {'number': '+254711111111', 'statusCode': 101},
+            {'number': '+254722222222', 'statusCode': 403},
+            {'number': '+254733333333', 'statusCode': 101}]}}
+        mock_post.return_value = mock_response
+
+        service = SMSService()
+        results = service.send_many([
+            ('0711111111', 'Cake', 10),
+            ('0722222222', 'Cake', 10),
+            ('0733333333', 'Bread', 5),
+        ])
+
+        assert results == [True, False, True]
+        assert mock_post.call_count == 2   # one bulk call per distinct message
+        first_call = mock_post.call_args_list[0]
+        assert '%2B254711111111%2C%2B254722222222' in first_call.kwargs['data']
+
+    @patch.dict(os.environ, {'AFRICASTALKING_USERNAME': 'user', 'AFRICASTALKING_API_KEY': 'key'})
+    def test_session_is_reused(self):
+        service = SMSService()
+        assert service.client is SMSService().client
+        assert service.client.session is service.client.session
+
+    @patch.dict(os.environ, {'AFRICASTALKING_USERNAME': 'user', 'AFRICASTALKING_API_KEY': 'key'})
+    def test_live_send_against_stub_server(self, stub_server):
+        stub_server.add('/bulk', status=201, body={'SMSMessageData': {'Recipients': [
+            {'number': '+254712345678', 'statusCode': 101}]}})
+        service = SMSService()
+        service.api_url = stub_server.url()
+
+        assert service.send_order_confirmation('0712345678', 'Tea', 3) is True
+        method, path, body = stub_server.requests[0]
+        assert (method, path) == ('POST', '/bulk')
+        assert 'to=%2B254712345678' in body
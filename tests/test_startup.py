@@ -0,0 +1,45 @@
+import os, sys
+import json
+import subprocess
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+# Cold create_app() in a fresh interpreter; raise via env on slow CI machines
+STARTUP_BUDGET_SECONDS = float(os.getenv('STARTUP_BUDGET_SECONDS', '1.5'))
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+from app import create_app, db
+app = create_app()
+elapsed = time.perf_counter() - start
+with app.app_context():
+    from sqlalchemy import inspect
+    tables = inspect(db.engine).get_table_names()
+print(json.dumps({
+    'elapsed': elapsed,
+    'tables': tables,
+    'loaded': [m for m in ('authlib', 'requests') if m in sys.modules],
+}))
+"""
+
+def run_probe(tmp_path, **env):
+    environ = dict(os.environ, DATABASE_URL=f"sqlite:///{tmp_path / 'startup.db'}", **env)
+    environ.pop('AUTO_CREATE_SCHEMA', None)
+    environ.update(env)
+    result = subprocess.run([sys.executable, '-c', PROBE], cwd=ROOT, env=environ,
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+class TestStartup:
+
+    def test_cold_start_is_lean(self, tmp_path):
+        probe = run_probe(tmp_path)
+        print(f"create_app cold start: {probe['elapsed'] * 1000:.0f} ms")
+        assert probe['loaded'] == []        # OAuth/HTTP clients load on first use
+        assert probe['tables'] == []        # no schema work on boot by default
+        assert probe['elapsed'] < STARTUP_BUDGET_SECONDS
+
+    def test_schema_creation_is_opt_in(self, tmp_path):
+        probe = run_probe(tmp_path, AUTO_CREATE_SCHEMA='1')
+        assert {'user', 'customer', 'order', 'schema_version'} <= set(probe['tables'])
@@ -0,0 +1,58 @@
+import os, sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import pytest
+from flask import render_template_string
+from flask_login import login_user
+from app import create_app, db
+from app.models import User
+from app.templating import warm_templates
+
+FRAGMENT = "{% cache 'rows', version %}{{ render() }}{% endcache %}"
+
+@pytest.mark.usefixtures("app")
+class TestTemplating:
+
+    def _render(self, app, user, version, calls):
+        def render():
+            calls.append(version)
+            return f"<b>rendered {len(calls)}</b>"
+        with app.test_request_context():
+            login_user(user)
+            return render_template_string(FRAGMENT, version=version, render=render)
+
+    def test_fragment_cached_by_key(self, app):
+        u = User(google_id="frag", email="frag@example.com", name="Frag")
+        db.session.add(u)
+        db.session.commit()
+        calls = []
+
+        first = self._render(app, u, 1, calls)
+        assert self._render(app, u, 1, calls) == first
+        assert calls == [1]
+        # a bumped data version renders again, still autoescaped
+        assert self._render(app, u, 2, calls) == "&lt;b&gt;rendered 2&lt;/b&gt;"
+
+        app.config["LIST_CACHE_ENABLED"] = False
+        self._render(app, u, 2, calls)
+        assert calls == [1, 2, 2]
+
+    def test_dashboard_tables_follow_writes(self, app, client):
+        u = User(google_id="frag-dash", email="dash@example.com", name="Dash")
+        db.session.add(u)
+        db.session.commit()
+        with client.session_transaction() as sess:
+            sess["_user_id"] = str(u.id)
+            sess["_fresh"] = True
+
+        assert "No customers yet." in client.get("/dashboard").get_data(as_text=True)
+        client.post("/customer", data={"name": "Fragment Foods", "phone": "0711000000"})
+        html = client.get("/dashboard").get_data(as_text=True)
+        assert "No customers yet." not in html
+        assert "<td>Fragment Foods</td>" in html
+
+    def test_bytecode_cache_written(self, tmp_path, monkeypatch):
+        import config
+        monkeypatch.setattr(config.Config, "JINJA_CACHE_DIR", str(tmp_path))
+        app = create_app()
+        assert warm_templates(app) == 3
+        assert len(list(tmp_path.iterdir())) == 3
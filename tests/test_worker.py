@@ -0,0 +1,49 @@
+import os, sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import pytest
+from datetime import datetime
+from app import db
+from app.models import SmsOutbox
+from app import worker
+
+@pytest.mark.usefixtures("app")
+class TestWorker:
+
+    def _queue(self, count=1):
+        for i in range(count):
+            db.session.add(SmsOutbox(phone="+254700000000", order_name=f"Item {i}", price=10))
+        db.session.commit()
+
+    def test_drain_marks_sent(self, app, monkeypatch):
+        self._queue(3)
+        monkeypatch.setattr(worker.sms_service, "send_many", lambda messages: [True] * len(messages))
+
+        sent, failed = worker.drain_outbox(batch_size=2)
+        assert (sent, failed) == (2, 0)
+        assert SmsOutbox.query.filter_by(status="pending").count() == 1
+
+        worker.run_worker(batch_size=2, once=True)
+        assert SmsOutbox.query.filter_by(status="sent").count() == 3
+
+    def test_failure_backs_off_then_gives_up(self, app, monkeypatch):
+        self._queue()
+        monkeypatch.setattr(worker.sms_service, "send_many", lambda messages: [False] * len(messages))
+
+        assert worker.drain_outbox(max_attempts=2) == (0, 1)
+        msg = SmsOutbox.query.first()
+        assert msg.status == "pending"
+        assert msg.attempts == 1
+        assert msg.next_attempt_at > datetime.utcnow()
+
+        # not due yet, so nothing is picked up
+        assert worker.drain_outbox(max_attempts=2) == (0, 0)
+
+        msg.next_attempt_at = datetime.utcnow()
+        db.session.commit()
+        worker.drain_outbox(max_attempts=2)
+        assert SmsOutbox.query.first().status == "failed"
+
+    def test_backoff_delay_is_capped(self):
+        assert worker.backoff_delay(1, base_delay=10) == 10
+        assert worker.backoff_delay(3, base_delay=10) == 40
+        assert worker.backoff_delay(20, base_delay=10, max_delay=60) == 60